@@ -0,0 +1,197 @@
+"""
+TTL response cache for API GET requests
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncGenerator, Dict, Optional
+
+import aiohttp
+import ijson
+import orjson
+
+try:
+    import zstandard
+    _zstd_compress = zstandard.ZstdCompressor(level=3).compress
+    _zstd_decompress = zstandard.ZstdDecompressor().decompress
+except ImportError:
+    _zstd_compress = _zstd_decompress = None
+
+logger = logging.getLogger(__name__)
+
+# Seconds a cached response stays fresh, per endpoint
+CACHE_TTL = {
+    'crypto_price': 30,
+    'market_overview': 60,
+    'news': 120,
+    'headlines': 120,
+    'news_sentiment': 300,
+    'news_poll': 300,
+    'tweets_recent': 2
+}
+
+MAX_CACHE_ENTRIES = 1024
+
+# Upper bound on how long a 429 Retry-After header may stall a request
+MAX_RETRY_AFTER = 30
+
+# (url, params) -> (expires_at, data, etag, last_modified), ordered from least
+# to most recently used. Expired entries are kept so they can be revalidated.
+_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+# Decompressing and parsing a cached page is a burst of CPU work; it runs here
+# instead of on the event loop (two workers cap the memory held in flight)
+_decode_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='http-cache')
+
+# (url, params) -> task for a fetch in progress, shared by concurrent callers
+_inflight: Dict[tuple, "asyncio.Task"] = {}
+
+def _cache_key(url: str, params: Optional[Dict]) -> tuple:
+    return url, frozenset(params.items()) if params else frozenset()
+
+def _retry_after(response: aiohttp.ClientResponse) -> float:
+    """Seconds to wait before retrying a rate-limited response"""
+    try:
+        delay = float(response.headers.get('Retry-After', 1))
+    except ValueError:
+        # HTTP-date form; fall back to a short pause
+        delay = 1
+    return min(max(delay, 0), MAX_RETRY_AFTER)
+
+def _fresh_for(response: aiohttp.ClientResponse, ttl: float) -> float:
+    """TTL for a response, shortened by Cache-Control when the server asks for it"""
+    cache_control = response.headers.get('Cache-Control')
+    if not cache_control:
+        return ttl
+    for directive in cache_control.split(','):
+        name, _, value = directive.strip().partition('=')
+        name = name.lower()
+        if name in ('no-store', 'no-cache'):
+            return 0
+        if name == 'max-age':
+            try:
+                return min(ttl, max(float(value.strip('"')), 0))
+            except ValueError:
+                pass
+    return ttl
+
+async def cached_get_json(session: aiohttp.ClientSession, url: str,
+                          params: Optional[Dict] = None, ttl: float = 60,
+                          headers: Optional[Dict] = None,
+                          timeout: Optional[aiohttp.ClientTimeout] = None) -> Any:
+    """GET a JSON resource, serving it from cache while the entry is fresh.
+
+    Expired entries are revalidated with If-None-Match / If-Modified-Since, and
+    a 304 Not Modified response re-serves the cached payload. A Cache-Control
+    max-age shorter than ttl (or no-cache / no-store) takes precedence. A 429
+    response is retried once after honouring its Retry-After header.
+    Concurrent misses for the same url and params share one request.
+    Raises aiohttp.ClientResponseError on non-2xx responses.
+    """
+    key = _cache_key(url, params)
+    now = time.monotonic()
+
+    entry = _cache.get(key)
+    if entry is not None and entry[0] > now:
+        _cache.move_to_end(key)
+        return entry[1]
+
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.ensure_future(_fetch_json(session, url, params, ttl, headers, timeout, key, entry))
+        _inflight[key] = task
+        task.add_done_callback(lambda _: _inflight.pop(key, None))
+
+    # Shielded so one caller being cancelled does not fail the others
+    return await asyncio.shield(task)
+
+async def _fetch_json(session: aiohttp.ClientSession, url: str, params: Optional[Dict],
+                      ttl: float, headers: Optional[Dict], timeout: Optional[aiohttp.ClientTimeout],
+                      key: tuple, entry: Optional[tuple]) -> Any:
+    """Fetch (or revalidate) a resource and store it in the cache"""
+    headers = dict(headers) if headers else {}
+    # Leave the session default in place unless a timeout is given
+    request_kwargs = {'timeout': timeout} if timeout is not None else {}
+    if entry is not None:
+        if entry[2]:
+            headers['If-None-Match'] = entry[2]
+        if entry[3]:
+            headers['If-Modified-Since'] = entry[3]
+
+    for attempt in range(2):
+        async with session.get(url, params=params, headers=headers, **request_kwargs) as response:
+            if response.status == 304 and entry is not None:
+                _store(key, (time.monotonic() + _fresh_for(response, ttl), *entry[1:]))
+                return entry[1]
+
+            if not response.ok:
+                # Hand the connection back without buffering the error body
+                response.release()
+                if response.status == 429 and attempt == 0:
+                    delay = _retry_after(response)
+                    logger.warning(f"Rate limited by {url}, retrying in {delay:g}s")
+                    await asyncio.sleep(delay)
+                    continue
+                response.raise_for_status()
+
+            data = orjson.loads(await response.read())
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            ttl = _fresh_for(response, ttl)
+            break
+
+    _store(key, (time.monotonic() + ttl, data, etag, last_modified))
+    return data
+
+def _pack(items: list) -> bytes:
+    """Serialize a streamed item list for the cache, zstd-compressed when available"""
+    packed = orjson.dumps(items)
+    return _zstd_compress(packed) if _zstd_compress is not None else packed
+
+def _unpack(packed: bytes) -> list:
+    return orjson.loads(_zstd_decompress(packed) if _zstd_decompress is not None else packed)
+
+def _store(key: tuple, entry: tuple):
+    """Insert a cache entry as most recently used, evicting the oldest past the cap"""
+    _cache[key] = entry
+    _cache.move_to_end(key)
+    while len(_cache) > MAX_CACHE_ENTRIES:
+        _cache.popitem(last=False)
+
+async def cached_stream_items(session: aiohttp.ClientSession, url: str, prefix: str,
+                              params: Optional[Dict] = None, ttl: float = 60,
+                              headers: Optional[Dict] = None,
+                              timeout: Optional[aiohttp.ClientTimeout] = None) -> AsyncGenerator[Any, None]:
+    """Yield the JSON items under an ijson prefix as the response body arrives.
+
+    The complete item list is cached once the body has been read (as orjson
+    bytes, zstd-compressed when zstandard is installed), and a fresh entry is
+    replayed without a request. There is no revalidation, since the body is
+    needed to stream anyway.
+    Raises aiohttp.ClientResponseError on non-2xx responses.
+    """
+    key = (*_cache_key(url, params), prefix)
+
+    entry = _cache.get(key)
+    if entry is not None and entry[0] > time.monotonic():
+        _cache.move_to_end(key)
+        items = await asyncio.get_running_loop().run_in_executor(_decode_pool, _unpack, entry[1])
+        for item in items:
+            yield item
+        return
+
+    request_kwargs = {'timeout': timeout} if timeout is not None else {}
+    items = []
+    async with session.get(url, params=params, headers=headers, **request_kwargs) as response:
+        if not response.ok:
+            response.release()
+            response.raise_for_status()
+
+        async for item in ijson.items_async(response.content, prefix, use_float=True):
+            items.append(item)
+            yield item
+        ttl = _fresh_for(response, ttl)
+
+    _store(key, (time.monotonic() + ttl, _pack(items), None, None))
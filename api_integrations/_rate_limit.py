@@ -0,0 +1,41 @@
+"""
+Token bucket rate limiter for API polling
+"""
+import asyncio
+import time
+
+class TokenBucket:
+    """Async token bucket: acquire() waits until a request may be sent"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.base_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Take one token, sleeping until the bucket has refilled enough"""
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+                self._refill()
+            self._tokens -= 1
+
+    def throttle(self, factor: float = 2.0, min_rate: float = 1 / 900):
+        """Slow the refill rate after the server pushes back (e.g. HTTP 429)"""
+        self._refill()
+        self.rate = max(self.rate / factor, min_rate)
+
+    def restore(self):
+        """Return to the configured rate once requests succeed again"""
+        if self.rate != self.base_rate:
+            self._refill()
+            self.rate = self.base_rate
@@ -0,0 +1,63 @@
+"""
+Shared HTTP session for API integrations
+"""
+import logging
+from typing import Optional
+
+import aiohttp
+import orjson
+
+try:
+    import brotli  # noqa: F401  (lets aiohttp decode 'br' responses)
+    _ACCEPT_ENCODING = 'gzip, br, deflate'
+except ImportError:
+    _ACCEPT_ENCODING = 'gzip, deflate'
+
+logger = logging.getLogger(__name__)
+
+_session: Optional[aiohttp.ClientSession] = None
+
+def _json_dumps(obj) -> str:
+    """Serialize request bodies with orjson (aiohttp expects str)"""
+    return orjson.dumps(obj).decode()
+
+async def get_session() -> aiohttp.ClientSession:
+    """Get the shared HTTP session, creating it on first use"""
+    global _session
+
+    if _session is None or _session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=100,
+            limit_per_host=20,
+            ttl_dns_cache=300,
+            keepalive_timeout=75,
+            enable_cleanup_closed=True
+        )
+        _session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=30),
+            headers={'Accept-Encoding': _ACCEPT_ENCODING},
+            auto_decompress=True,
+            json_serialize=_json_dumps
+        )
+        logger.debug("Shared HTTP session created")
+
+    return _session
+
+def install_uvloop():
+    """Run asyncio on uvloop when it is installed (call before asyncio.run)"""
+    try:
+        import uvloop
+    except ImportError:
+        return
+
+    uvloop.install()
+    logger.debug("uvloop event loop policy installed")
+
+async def close_session():
+    """Close the shared HTTP session (call once at application shutdown)"""
+    global _session
+
+    if _session is not None:
+        await _session.close()
+        _session = None
@@ -5,15 +5,51 @@ import asyncio
 import aiohttp
 import logging
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from functools import lru_cache
+from types import MappingProxyType
+from typing import AsyncGenerator, List, Dict, Optional, Tuple
+import numpy as np
+import orjson
+import pandas as pd
 import yfinance as yf
 import json
 
+from api_integrations._http_cache import CACHE_TTL, cached_get_json
+from api_integrations._session import get_session
 from config import api_config, data_config
 from core.data_models import MarketData
 
 logger = logging.getLogger(__name__)
 
+# Random generator for mock data
+_rng = np.random.default_rng()
+
+# CoinGecko coin IDs for supported crypto symbols
+_COINGECKO_IDS = MappingProxyType({
+    'BTC': 'bitcoin',
+    'ETH': 'ethereum',
+    'ADA': 'cardano',
+    'SOL': 'solana',
+    'MATIC': 'polygon',
+    'DOGE': 'dogecoin',
+    'XRP': 'ripple'
+})
+
+# Upper-cased symbol sets used to route symbols to the stock or crypto source
+_STOCK_SYMBOLS = frozenset(s.upper() for s in data_config.STOCK_SYMBOLS)
+_CRYPTO_SYMBOLS = frozenset(s.upper() for s in data_config.CRYPTO_SYMBOLS)
+
+@lru_cache(maxsize=64)
+def _coingecko_query(symbols: Tuple[str, ...]) -> Tuple[str, Tuple[str, ...], Tuple[str, ...]]:
+    """Build the CoinGecko ids parameter, canonical symbols and coin IDs for a symbol set"""
+    canonical_symbols = tuple(symbol.upper() for symbol in symbols)
+    coin_ids = tuple(_COINGECKO_IDS.get(symbol, symbol.lower()) for symbol in canonical_symbols)
+    return ','.join(coin_ids), canonical_symbols, coin_ids
+
+async def _no_data() -> list:
+    """Placeholder fetch for an empty symbol group"""
+    return []
+
 class FinancialDataClient:
     """Financial data client for market data collection"""
     
@@ -21,71 +57,98 @@ class FinancialDataClient:
         self.session: Optional[aiohttp.ClientSession] = None
         
     async def start_session(self):
-        """Start HTTP session"""
-        if not self.session:
-            self.session = aiohttp.ClientSession()
+        """Attach the shared HTTP session"""
+        self.session = await get_session()
     
     async def close_session(self):
-        """Close HTTP session"""
-        if self.session:
-            await self.session.close()
-            self.session = None
+        """Release the shared HTTP session (closed at application shutdown)"""
+        self.session = None
     
     async def get_stock_data(self, symbols: List[str]) -> List[MarketData]:
         """Get stock market data using yfinance"""
-        market_data_list = []
-        
         try:
-            for symbol in symbols:
-                ticker = yf.Ticker(symbol)
-                info = ticker.info
-                hist = ticker.history(period="1d", interval="1m")
-                
-                if not hist.empty:
-                    latest = hist.iloc[-1]
-                    
-                    market_data = MarketData(
-                        symbol=symbol,
-                        timestamp=datetime.now(),
-                        price=float(latest['Close']),
-                        volume=float(latest['Volume']),
-                        change_24h=float((latest['Close'] - hist.iloc[0]['Open']) / hist.iloc[0]['Open']),
-                        market_cap=info.get('marketCap'),
-                        additional_metrics={
-                            'high_24h': float(hist['High'].max()),
-                            'low_24h': float(hist['Low'].min()),
-                            'open': float(hist.iloc[0]['Open']),
-                            'previous_close': float(info.get('previousClose', latest['Close']))
-                        }
-                    )
-                    
-                    market_data_list.append(market_data)
-                    
+            # yfinance is blocking, keep it off the event loop
+            history = await asyncio.to_thread(self._download_history, symbols)
         except Exception as e:
             logger.error(f"Error fetching stock data: {e}")
             # Return mock data for demo
             return await self._generate_mock_stock_data(symbols)
         
+        # Fetch ticker info for all symbols in parallel
+        infos = await asyncio.gather(
+            *(asyncio.to_thread(self._fetch_info, symbol) for symbol in symbols),
+            return_exceptions=True
+        )
+        
+        market_data_list = []
+        failed_symbols = []
+        
+        for symbol, info in zip(symbols, infos):
+            if isinstance(info, Exception):
+                logger.error(f"Error fetching stock data for {symbol}: {info}")
+                failed_symbols.append(symbol)
+                continue
+            
+            hist = self._symbol_history(history, symbol)
+            if hist is None or hist.empty:
+                continue
+            
+            latest = hist.iloc[-1]
+            
+            market_data = MarketData(
+                symbol=symbol,
+                timestamp=datetime.now(),
+                price=float(latest['Close']),
+                volume=float(latest['Volume']),
+                change_24h=float((latest['Close'] - hist.iloc[0]['Open']) / hist.iloc[0]['Open']),
+                market_cap=info.get('marketCap'),
+                additional_metrics={
+                    'high_24h': float(hist['High'].max()),
+                    'low_24h': float(hist['Low'].min()),
+                    'open': float(hist.iloc[0]['Open']),
+                    'previous_close': float(info.get('previousClose', latest['Close']))
+                }
+            )
+            
+            market_data_list.append(market_data)
+        
+        if failed_symbols:
+            # Return mock data for demo
+            market_data_list.extend(await self._generate_mock_stock_data(failed_symbols))
+        
         return market_data_list
     
+    def _download_history(self, symbols: List[str]) -> pd.DataFrame:
+        """Fetch intraday history for all symbols in a single batched download"""
+        return yf.download(
+            tickers=symbols,
+            period="1d",
+            interval="1m",
+            group_by="ticker",
+            threads=True,
+            progress=False
+        )
+    
+    def _fetch_info(self, symbol: str) -> Dict:
+        """Fetch ticker info (market cap, previous close) for a symbol"""
+        return yf.Ticker(symbol).info
+    
+    def _symbol_history(self, history: pd.DataFrame, symbol: str) -> Optional[pd.DataFrame]:
+        """Extract a single symbol's rows from a batched download"""
+        # Single-ticker downloads come back without the ticker column level
+        if isinstance(history.columns, pd.MultiIndex):
+            if symbol not in history.columns.get_level_values(0):
+                return None
+            history = history[symbol]
+        return history.dropna(subset=['Close'])
+    
     async def get_crypto_data(self, symbols: List[str]) -> List[MarketData]:
         """Get cryptocurrency data from CoinGecko API"""
         await self.start_session()
         
         try:
             # Convert symbols to CoinGecko IDs
-            symbol_map = {
-                'BTC': 'bitcoin',
-                'ETH': 'ethereum',
-                'ADA': 'cardano',
-                'SOL': 'solana',
-                'MATIC': 'polygon',
-                'DOGE': 'dogecoin',
-                'XRP': 'ripple'
-            }
-            
-            coin_ids = [symbol_map.get(symbol.upper(), symbol.lower()) for symbol in symbols]
-            ids_string = ','.join(coin_ids)
+            ids_string, canonical_symbols, coin_ids = _coingecko_query(tuple(symbols))
             
             url = "https://api.coingecko.com/api/v3/simple/price"
             params = {
@@ -96,29 +159,24 @@ class FinancialDataClient:
                 'include_24hr_change': 'true'
             }
             
-            async with self.session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return self._parse_coingecko_data(data, symbols, symbol_map)
-                else:
-                    logger.error(f"CoinGecko API error: {response.status}")
-                    return await self._generate_mock_crypto_data(symbols)
-                    
+            data = await cached_get_json(self.session, url, params, ttl=CACHE_TTL['crypto_price'])
+            return self._parse_coingecko_data(data, canonical_symbols, coin_ids)
+            
         except Exception as e:
             logger.error(f"Error fetching crypto data: {e}")
             return await self._generate_mock_crypto_data(symbols)
     
-    def _parse_coingecko_data(self, data: Dict, symbols: List[str], symbol_map: Dict) -> List[MarketData]:
+    def _parse_coingecko_data(self, data: Dict, symbols: Tuple[str, ...],
+                              coin_ids: Tuple[str, ...]) -> List[MarketData]:
         """Parse CoinGecko API response"""
         market_data_list = []
         
-        for symbol in symbols:
-            coin_id = symbol_map.get(symbol.upper(), symbol.lower())
+        for symbol, coin_id in zip(symbols, coin_ids):
             coin_data = data.get(coin_id, {})
             
             if coin_data:
                 market_data = MarketData(
-                    symbol=symbol.upper(),
+                    symbol=symbol,
                     timestamp=datetime.now(),
                     price=coin_data.get('usd', 0),
                     volume=coin_data.get('usd_24h_vol', 0),
@@ -142,75 +200,76 @@ class FinancialDataClient:
             # Get crypto market overview
             url = "https://api.coingecko.com/api/v3/global"
             
-            async with self.session.get(url) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    global_data = data.get('data', {})
-                    
-                    return {
-                        'total_market_cap_usd': global_data.get('total_market_cap', {}).get('usd', 0),
-                        'total_volume_24h_usd': global_data.get('total_volume', {}).get('usd', 0),
-                        'market_cap_change_24h': global_data.get('market_cap_change_percentage_24h_usd', 0),
-                        'active_cryptocurrencies': global_data.get('active_cryptocurrencies', 0),
-                        'markets': global_data.get('markets', 0),
-                        'market_cap_percentage': global_data.get('market_cap_percentage', {}),
-                        'updated_at': datetime.now().isoformat()
-                    }
-                else:
-                    logger.error(f"Market overview API error: {response.status}")
-                    return {}
-                    
+            data = await cached_get_json(self.session, url, ttl=CACHE_TTL['market_overview'])
+            global_data = data.get('data', {})
+            
+            return {
+                'total_market_cap_usd': global_data.get('total_market_cap', {}).get('usd', 0),
+                'total_volume_24h_usd': global_data.get('total_volume', {}).get('usd', 0),
+                'market_cap_change_24h': global_data.get('market_cap_change_percentage_24h_usd', 0),
+                'active_cryptocurrencies': global_data.get('active_cryptocurrencies', 0),
+                'markets': global_data.get('markets', 0),
+                'market_cap_percentage': global_data.get('market_cap_percentage', {}),
+                'updated_at': datetime.now().isoformat()
+            }
+            
         except Exception as e:
             logger.error(f"Error fetching market overview: {e}")
             return {}
     
-    async def stream_market_data(self, symbols: List[str], update_interval: int = 60) -> List[MarketData]:
-        """Stream market data with regular updates"""
+    async def stream_market_data(self, symbols: List[str],
+                                 update_interval: int = 60) -> AsyncGenerator[List[MarketData], None]:
+        """Stream batches of market data with regular updates"""
+        # The symbol list is fixed for the stream, so classify it once
+        upper_symbols = [(s, s.upper()) for s in symbols]
+        stock_symbols = [s for s, upper in upper_symbols if upper in _STOCK_SYMBOLS]
+        crypto_symbols = [s for s, upper in upper_symbols if upper in _CRYPTO_SYMBOLS]
+        
         while True:
             try:
-                # Get stock data
-                stock_symbols = [s for s in symbols if s.upper() in data_config.STOCK_SYMBOLS]
-                crypto_symbols = [s for s in symbols if s.upper() in data_config.CRYPTO_SYMBOLS]
-                
-                all_data = []
-                
-                if stock_symbols:
-                    stock_data = await self.get_stock_data(stock_symbols)
-                    all_data.extend(stock_data)
-                
-                if crypto_symbols:
-                    crypto_data = await self.get_crypto_data(crypto_symbols)
-                    all_data.extend(crypto_data)
+                # Fetch stock and crypto data concurrently
+                stock_data, crypto_data = await asyncio.gather(
+                    self.get_stock_data(stock_symbols) if stock_symbols else _no_data(),
+                    self.get_crypto_data(crypto_symbols) if crypto_symbols else _no_data()
+                )
                 
-                return all_data
+                yield [*stock_data, *crypto_data]
                 
             except Exception as e:
                 logger.error(f"Error in market data stream: {e}")
-                return []
-            finally:
-                await asyncio.sleep(update_interval)
+            
+            await asyncio.sleep(update_interval)
     
     async def _generate_mock_stock_data(self, symbols: List[str]) -> List[MarketData]:
         """Generate mock stock data for demo"""
-        import random
-        
         mock_data = []
         base_prices = {'AAPL': 150, 'GOOGL': 2500, 'MSFT': 300, 'TSLA': 800, 'AMZN': 3000}
         
-        for symbol in symbols:
-            base_price = base_prices.get(symbol, random.uniform(50, 500))
-            current_price = base_price * random.uniform(0.95, 1.05)
+        # Draw every random column for the batch at once
+        n = len(symbols)
+        fallback_prices = _rng.uniform(50, 500, n).tolist()
+        price_moves = _rng.uniform(0.95, 1.05, n).tolist()
+        volumes = _rng.uniform(1000000, 50000000, n).tolist()
+        changes = _rng.uniform(-0.1, 0.1, n).tolist()
+        cap_multipliers = _rng.uniform(1e9, 1e12, n).tolist()
+        high_moves = _rng.uniform(1.0, 1.05, n).tolist()
+        low_moves = _rng.uniform(0.95, 1.0, n).tolist()
+        now = datetime.now()
+        
+        for i, symbol in enumerate(symbols):
+            base_price = base_prices.get(symbol, fallback_prices[i])
+            current_price = base_price * price_moves[i]
             
             mock_data.append(MarketData(
                 symbol=symbol,
-                timestamp=datetime.now(),
+                timestamp=now,
                 price=current_price,
-                volume=random.uniform(1000000, 50000000),
-                change_24h=random.uniform(-0.1, 0.1),
-                market_cap=current_price * random.uniform(1e9, 1e12),
+                volume=volumes[i],
+                change_24h=changes[i],
+                market_cap=current_price * cap_multipliers[i],
                 additional_metrics={
-                    'high_24h': current_price * random.uniform(1.0, 1.05),
-                    'low_24h': current_price * random.uniform(0.95, 1.0),
+                    'high_24h': current_price * high_moves[i],
+                    'low_24h': current_price * low_moves[i],
                     'source': 'mock_data'
                 }
             ))
@@ -219,25 +278,33 @@ class FinancialDataClient:
     
     async def _generate_mock_crypto_data(self, symbols: List[str]) -> List[MarketData]:
         """Generate mock crypto data for demo"""
-        import random
-        
         mock_data = []
         base_prices = {'BTC': 45000, 'ETH': 3000, 'ADA': 1.2, 'SOL': 100, 'MATIC': 0.8}
         
-        for symbol in symbols:
-            base_price = base_prices.get(symbol.upper(), random.uniform(0.1, 1000))
-            current_price = base_price * random.uniform(0.9, 1.1)
+        # Draw every random column for the batch at once
+        n = len(symbols)
+        fallback_prices = _rng.uniform(0.1, 1000, n).tolist()
+        price_moves = _rng.uniform(0.9, 1.1, n).tolist()
+        volumes = _rng.uniform(100000000, 10000000000, n).tolist()
+        changes = _rng.uniform(-0.15, 0.15, n).tolist()
+        cap_multipliers = _rng.uniform(1e9, 1e12, n).tolist()
+        volatilities = _rng.uniform(0.02, 0.08, n).tolist()
+        now = datetime.now()
+        
+        for i, symbol in enumerate(symbols):
+            base_price = base_prices.get(symbol.upper(), fallback_prices[i])
+            current_price = base_price * price_moves[i]
             
             mock_data.append(MarketData(
                 symbol=symbol.upper(),
-                timestamp=datetime.now(),
+                timestamp=now,
                 price=current_price,
-                volume=random.uniform(100000000, 10000000000),
-                change_24h=random.uniform(-0.15, 0.15),
-                market_cap=current_price * random.uniform(1e9, 1e12),
+                volume=volumes[i],
+                change_24h=changes[i],
+                market_cap=current_price * cap_multipliers[i],
                 additional_metrics={
                     'source': 'mock_data',
-                    'volatility': random.uniform(0.02, 0.08)
+                    'volatility': volatilities[i]
                 }
             ))
         
@@ -252,15 +319,12 @@ class AlphaVantageClient:
         self.session: Optional[aiohttp.ClientSession] = None
     
     async def start_session(self):
-        """Start HTTP session"""
-        if not self.session:
-            self.session = aiohttp.ClientSession()
+        """Attach the shared HTTP session"""
+        self.session = await get_session()
     
     async def close_session(self):
-        """Close HTTP session"""
-        if self.session:
-            await self.session.close()
-            self.session = None
+        """Release the shared HTTP session (closed at application shutdown)"""
+        self.session = None
     
     async def get_intraday_data(self, symbol: str, interval: str = '5min') -> Optional[MarketData]:
         """Get intraday stock data"""
@@ -278,18 +342,19 @@ class AlphaVantageClient:
             }
             
             async with self.session.get(self.base_url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return self._parse_intraday_data(data, symbol)
-                else:
+                if not response.ok:
+                    response.release()
                     logger.error(f"Alpha Vantage API error: {response.status}")
                     return None
+                
+                data = await response.json(loads=orjson.loads)
+                return self._parse_intraday_data(data, symbol, interval)
                     
         except Exception as e:
             logger.error(f"Error fetching Alpha Vantage data: {e}")
             return None
     
-    def _parse_intraday_data(self, data: Dict, symbol: str) -> Optional[MarketData]:
+    def _parse_intraday_data(self, data: Dict, symbol: str, interval: str = '5min') -> Optional[MarketData]:
         """Parse Alpha Vantage intraday data"""
         try:
             time_series_key = f"Time Series ({interval})"
@@ -304,7 +369,7 @@ class AlphaVantageClient:
             
             return MarketData(
                 symbol=symbol,
-                timestamp=datetime.strptime(latest_time, '%Y-%m-%d %H:%M:%S'),
+                timestamp=datetime.fromisoformat(latest_time),
                 price=float(latest_data['4. close']),
                 volume=float(latest_data['5. volume']),
                 change_24h=0,  # Would need additional calculation
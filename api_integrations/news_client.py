@@ -3,16 +3,40 @@ News API integration for financial news sentiment analysis
 """
 import asyncio
 import aiohttp
+import itertools
 import logging
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from types import MappingProxyType
+from typing import AsyncGenerator, List, Dict, Optional
+import ijson
 import json
+import numpy as np
+import xxhash
 
+from api_integrations._http_cache import CACHE_TTL, cached_get_json
+from api_integrations._session import get_session
 from config import api_config, data_config
 from core.data_models import RawData, DataSource
 
 logger = logging.getLogger(__name__)
 
+# Random generator for mock data
+_rng = np.random.default_rng()
+
+# Sequence that keeps mock IDs unique within the process
+_mock_seq = itertools.count()
+
+# Number of article hashes remembered by stream_financial_news
+MAX_SEEN_ARTICLES = 10000
+
+# NEWS_SENTIMENT requests at or above this limit are stream-parsed, not cached
+SENTIMENT_STREAM_MIN_LIMIT = 200
+
+# Stand-in for articles whose 'source' is missing or null
+_EMPTY_SOURCE = MappingProxyType({})
+
 class NewsAPIClient:
     """News API client for financial news aggregation"""
     
@@ -22,15 +46,12 @@ class NewsAPIClient:
         self.session: Optional[aiohttp.ClientSession] = None
         
     async def start_session(self):
-        """Start HTTP session"""
-        if not self.session:
-            self.session = aiohttp.ClientSession()
+        """Attach the shared HTTP session"""
+        self.session = await get_session()
     
     async def close_session(self):
-        """Close HTTP session"""
-        if self.session:
-            await self.session.close()
-            self.session = None
+        """Release the shared HTTP session (closed at application shutdown)"""
+        self.session = None
     
     async def get_financial_news(self, query: str = None, sources: List[str] = None, 
                                 language: str = 'en', page_size: int = 100) -> List[RawData]:
@@ -58,13 +79,8 @@ class NewsAPIClient:
             if sources:
                 params['sources'] = ','.join(sources)
             
-            async with self.session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return self._parse_news_response(data)
-                else:
-                    logger.error(f"News API error: {response.status}")
-                    return []
+            data = await cached_get_json(self.session, url, params, ttl=CACHE_TTL['news'])
+            return self._parse_news_response(data)
         except Exception as e:
             logger.error(f"Error fetching news: {e}")
             return []
@@ -87,46 +103,46 @@ class NewsAPIClient:
                 'apiKey': self.api_key
             }
             
-            async with self.session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return self._parse_news_response(data)
-                else:
-                    logger.error(f"Headlines API error: {response.status}")
-                    return []
+            data = await cached_get_json(self.session, url, params, ttl=CACHE_TTL['headlines'])
+            return self._parse_news_response(data)
         except Exception as e:
             logger.error(f"Error fetching headlines: {e}")
             return []
     
-    async def stream_financial_news(self, update_interval: int = 300) -> List[RawData]:
-        """Stream financial news with regular updates"""
+    async def stream_financial_news(self, update_interval: int = 300) -> AsyncGenerator[List[RawData], None]:
+        """Stream batches of financial news with regular updates"""
+        # Article hashes seen across polls, oldest evicted first
+        seen_articles: "OrderedDict[int, None]" = OrderedDict()
+        
         while True:
             try:
-                # Get recent financial news
-                news_articles = await self.get_financial_news(page_size=20)
-                
-                # Get business headlines
-                headlines = await self.get_top_headlines(page_size=10)
+                # Get recent financial news and business headlines concurrently
+                news_articles, headlines = await asyncio.gather(
+                    self.get_financial_news(page_size=20),
+                    self.get_top_headlines(page_size=10)
+                )
                 
-                # Combine and return
+                # Combine and emit
                 all_news = news_articles + headlines
                 
-                # Remove duplicates based on URL
-                seen_urls = set()
+                # Drop articles already emitted in this or an earlier poll.
+                # API article IDs are derived from the article URL.
                 unique_news = []
                 for article in all_news:
-                    url = article.metadata.get('url', '')
-                    if url not in seen_urls:
-                        seen_urls.add(url)
+                    article_hash = xxhash.xxh3_64_intdigest(article.id.encode())
+                    if article_hash not in seen_articles:
+                        seen_articles[article_hash] = None
                         unique_news.append(article)
                 
-                return unique_news
+                while len(seen_articles) > MAX_SEEN_ARTICLES:
+                    seen_articles.popitem(last=False)
+                
+                yield unique_news
                 
             except Exception as e:
                 logger.error(f"Error in news stream: {e}")
-                return []
-            finally:
-                await asyncio.sleep(update_interval)
+            
+            await asyncio.sleep(update_interval)
     
     def _parse_news_response(self, data: Dict) -> List[RawData]:
         """Parse News API response into RawData objects"""
@@ -134,36 +150,42 @@ class NewsAPIClient:
         
         try:
             articles = data.get('articles', [])
+            now = datetime.now()
             
             for article in articles:
+                article_get = article.get
+                
                 # Skip articles without content
-                if not article.get('title') or article.get('title') == '[Removed]':
+                title = article_get('title')
+                if not title or title == '[Removed]':
                     continue
                 
+                source_get = (article_get('source') or _EMPTY_SOURCE).get
+                
                 # Combine title and description
-                content = article['title']
-                if article.get('description'):
-                    content += f" {article['description']}"
+                description = article_get('description')
+                content = f"{title} {description}" if description else title
+                
+                # Only slice content that is longer than the snippet
+                content_raw = article_get('content') or ''
+                snippet = content_raw if len(content_raw) <= 200 else content_raw[:200]
                 
                 # Parse timestamp
-                published_at = article.get('publishedAt')
-                if published_at:
-                    timestamp = datetime.fromisoformat(published_at.replace('Z', '+00:00'))
-                else:
-                    timestamp = datetime.now()
+                published_at = article_get('publishedAt')
+                timestamp = datetime.fromisoformat(published_at) if published_at else now
                 
                 raw_data = RawData(
-                    id=f"news_{hash(article.get('url', content))}",
+                    id=f"news_{xxhash.xxh3_64_hexdigest((article_get('url') or content).encode())}",
                     source=DataSource.NEWS,
                     timestamp=timestamp,
                     content=content,
-                    author=article.get('author', article.get('source', {}).get('name', 'Unknown')),
+                    author=article_get('author', source_get('name', 'Unknown')),
                     metadata={
-                        'url': article.get('url', ''),
-                        'source_name': article.get('source', {}).get('name', ''),
-                        'source_id': article.get('source', {}).get('id', ''),
-                        'url_to_image': article.get('urlToImage', ''),
-                        'content_snippet': article.get('content', '')[:200] if article.get('content') else ''
+                        'url': article_get('url', ''),
+                        'source_name': source_get('name', ''),
+                        'source_id': source_get('id', ''),
+                        'url_to_image': article_get('urlToImage', ''),
+                        'content_snippet': snippet
                     }
                 )
                 
@@ -202,21 +224,32 @@ class NewsAPIClient:
             "Corporate treasury diversification strategies now commonly include cryptocurrency holdings."
         ]
         
-        import random
+        authors = ["Financial Times", "Reuters", "Bloomberg", "CNBC", "MarketWatch"]
+        source_names = ["Financial Times", "Reuters", "Bloomberg"]
+        
+        # Draw every random pick for the batch at once
+        headline_idx = _rng.integers(0, len(mock_headlines), count).tolist()
+        description_idx = _rng.integers(0, len(mock_descriptions), count).tolist()
+        ages = _rng.integers(0, 1440, count, endpoint=True).tolist()
+        author_idx = _rng.integers(0, len(authors), count).tolist()
+        source_idx = _rng.integers(0, len(source_names), count).tolist()
+        now = datetime.now()
+        base_ts = time.monotonic_ns()
+        
         news_articles = []
         for i in range(count):
-            headline = random.choice(mock_headlines)
-            description = random.choice(mock_descriptions)
+            headline = mock_headlines[headline_idx[i]]
+            description = mock_descriptions[description_idx[i]]
             
             news_articles.append(RawData(
-                id=f"mock_news_{datetime.now().timestamp()}_{i}",
+                id=f"mock_news_{base_ts}_{next(_mock_seq)}",
                 source=DataSource.NEWS,
-                timestamp=datetime.now() - timedelta(minutes=random.randint(0, 1440)),
+                timestamp=now - timedelta(minutes=ages[i]),
                 content=f"{headline} {description}",
-                author=random.choice(["Financial Times", "Reuters", "Bloomberg", "CNBC", "MarketWatch"]),
+                author=authors[author_idx[i]],
                 metadata={
                     'url': f"https://example.com/news/{i}",
-                    'source_name': random.choice(["Financial Times", "Reuters", "Bloomberg"]),
+                    'source_name': source_names[source_idx[i]],
                     'category': 'finance'
                 }
             ))
@@ -236,15 +269,20 @@ class NewsAPIClient:
             "Consumer Confidence Index Reaches New Monthly High"
         ]
         
-        import random
+        # Draw every random pick for the batch at once
+        headline_idx = _rng.integers(0, len(mock_headlines), count).tolist()
+        ages = _rng.integers(0, 360, count, endpoint=True).tolist()
+        now = datetime.now()
+        base_ts = time.monotonic_ns()
+        
         headlines = []
         for i in range(count):
-            headline = random.choice(mock_headlines)
+            headline = mock_headlines[headline_idx[i]]
             
             headlines.append(RawData(
-                id=f"mock_headline_{datetime.now().timestamp()}_{i}",
+                id=f"mock_headline_{base_ts}_{next(_mock_seq)}",
                 source=DataSource.NEWS,
-                timestamp=datetime.now() - timedelta(minutes=random.randint(0, 360)),
+                timestamp=now - timedelta(minutes=ages[i]),
                 content=headline,
                 author="News Wire",
                 metadata={
@@ -265,15 +303,12 @@ class AlphaVantageNewsClient:
         self.session: Optional[aiohttp.ClientSession] = None
     
     async def start_session(self):
-        """Start HTTP session"""
-        if not self.session:
-            self.session = aiohttp.ClientSession()
+        """Attach the shared HTTP session"""
+        self.session = await get_session()
     
     async def close_session(self):
-        """Close HTTP session"""
-        if self.session:
-            await self.session.close()
-            self.session = None
+        """Release the shared HTTP session (closed at application shutdown)"""
+        self.session = None
     
     async def get_news_sentiment(self, tickers: List[str] = None, 
                                 topics: List[str] = None, limit: int = 50) -> List[RawData]:
@@ -296,61 +331,82 @@ class AlphaVantageNewsClient:
             if topics:
                 params['topics'] = ','.join(topics)
             
-            async with self.session.get(self.base_url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return self._parse_sentiment_response(data)
-                else:
-                    logger.error(f"Alpha Vantage API error: {response.status}")
-                    return []
+            if limit >= SENTIMENT_STREAM_MIN_LIMIT:
+                return [article async for article in self._stream_sentiment_feed(params)]
+            
+            data = await cached_get_json(self.session, self.base_url, params, ttl=CACHE_TTL['news_sentiment'])
+            return self._parse_sentiment_response(data)
         except Exception as e:
             logger.error(f"Error fetching Alpha Vantage news: {e}")
             return []
     
+    async def _stream_sentiment_feed(self, params: Dict) -> AsyncGenerator[RawData, None]:
+        """Parse feed articles as the response body arrives instead of buffering it"""
+        async with self.session.get(self.base_url, params=params) as response:
+            if not response.ok:
+                response.release()
+                logger.error(f"Alpha Vantage API error: {response.status}")
+                return
+            
+            now = datetime.now()
+            async for article in ijson.items_async(response.content, 'feed.item', use_float=True):
+                try:
+                    yield self._parse_sentiment_article(article, now)
+                except Exception as e:
+                    logger.error(f"Error parsing Alpha Vantage article: {e}")
+    
     def _parse_sentiment_response(self, data: Dict) -> List[RawData]:
         """Parse Alpha Vantage news sentiment response"""
         raw_data_list = []
         
         try:
             feed = data.get('feed', [])
+            now = datetime.now()
             
             for article in feed:
-                # Combine title and summary
-                content = article.get('title', '')
-                if article.get('summary'):
-                    content += f" {article['summary']}"
-                
-                # Parse timestamp
-                time_published = article.get('time_published')
-                if time_published:
-                    # Alpha Vantage format: YYYYMMDDTHHMMSS
-                    timestamp = datetime.strptime(time_published, '%Y%m%dT%H%M%S')
-                else:
-                    timestamp = datetime.now()
-                
-                raw_data = RawData(
-                    id=f"alphavantage_{hash(article.get('url', content))}",
-                    source=DataSource.NEWS,
-                    timestamp=timestamp,
-                    content=content,
-                    author=article.get('source', 'Alpha Vantage'),
-                    metadata={
-                        'url': article.get('url', ''),
-                        'source': article.get('source', ''),
-                        'overall_sentiment_score': article.get('overall_sentiment_score', 0),
-                        'overall_sentiment_label': article.get('overall_sentiment_label', 'Neutral'),
-                        'ticker_sentiment': article.get('ticker_sentiment', []),
-                        'topics': article.get('topics', [])
-                    }
-                )
-                
-                raw_data_list.append(raw_data)
+                raw_data_list.append(self._parse_sentiment_article(article, now))
                 
         except Exception as e:
             logger.error(f"Error parsing Alpha Vantage response: {e}")
         
         return raw_data_list
     
+    def _parse_sentiment_article(self, article: Dict, now: datetime) -> RawData:
+        """Parse a single Alpha Vantage feed article"""
+        article_get = article.get
+        
+        # Combine title and summary
+        title = article_get('title', '')
+        summary = article_get('summary')
+        content = f"{title} {summary}" if summary else title
+        
+        # Parse timestamp
+        time_published = article_get('time_published')
+        if time_published:
+            # Alpha Vantage format: YYYYMMDDTHHMMSS
+            timestamp = datetime(
+                int(time_published[0:4]), int(time_published[4:6]), int(time_published[6:8]),
+                int(time_published[9:11]), int(time_published[11:13]), int(time_published[13:15])
+            )
+        else:
+            timestamp = now
+        
+        return RawData(
+            id=f"alphavantage_{xxhash.xxh3_64_hexdigest((article_get('url') or content).encode())}",
+            source=DataSource.NEWS,
+            timestamp=timestamp,
+            content=content,
+            author=article_get('source', 'Alpha Vantage'),
+            metadata={
+                'url': article_get('url', ''),
+                'source': article_get('source', ''),
+                'overall_sentiment_score': article_get('overall_sentiment_score', 0),
+                'overall_sentiment_label': article_get('overall_sentiment_label', 'Neutral'),
+                'ticker_sentiment': article_get('ticker_sentiment', []),
+                'topics': article_get('topics', [])
+            }
+        )
+    
     async def _generate_mock_sentiment_news(self, count: int) -> List[RawData]:
         """Generate mock sentiment news for demo"""
         # This would be similar to the NewsAPI mock data
@@ -3,19 +3,46 @@ Reddit API integration for sentiment analysis
 """
 import asyncio
 import aiohttp
+import itertools
 import logging
+import time
+from collections import OrderedDict
 from datetime import datetime
 from typing import List, Dict, Optional, AsyncGenerator
 import base64
+import numpy as np
+import orjson
 
+from api_integrations._session import get_session
 from config import api_config, data_config
 from core.data_models import RawData, DataSource
 
 logger = logging.getLogger(__name__)
 
+# Random generator for mock data
+_rng = np.random.default_rng()
+
+# Sequence that keeps mock IDs unique within the process
+_mock_seq = itertools.count()
+
+# Maximum Reddit requests in flight at once (matches the per-host connection limit)
+MAX_CONCURRENT_REQUESTS = 20
+
+# Subreddit listings remembered for ETag revalidation
+MAX_LISTING_CACHE_ENTRIES = 64
+
+# Subreddits sampled by the mock generators (sorted so indexing is stable)
+_MOCK_SUBREDDITS = tuple(sorted(data_config.REDDIT_SUBREDDITS))
+
+# Text Reddit substitutes for deleted or removed posts and comments
+_REMOVED_BODIES = frozenset(('[deleted]', '[removed]'))
+
 class RedditAPIClient:
     """Reddit API client for sentiment data collection"""
     
+    # Pre-encoded client-credentials grant for the token endpoint
+    _TOKEN_REQUEST_BODY = b'grant_type=client_credentials'
+    
     def __init__(self):
         self.client_id = api_config.REDDIT_CLIENT_ID
         self.client_secret = api_config.REDDIT_CLIENT_SECRET
@@ -24,45 +51,51 @@ class RedditAPIClient:
         self.auth_url = "https://www.reddit.com/api/v1/access_token"
         self.session: Optional[aiohttp.ClientSession] = None
         self.access_token: Optional[str] = None
+        self._auth_headers: Dict[str, str] = {'User-Agent': self.user_agent}
+        self._request_slots = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        self._auth_lock = asyncio.Lock()
+        # (url, limit, time_filter) -> (etag, parsed posts), least recently used first
+        self._listing_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+        
+        # Token request headers never change, so build them once
+        basic_auth = base64.b64encode(f"{self.client_id}:{self.client_secret}".encode('ascii')).decode('ascii')
+        self._token_headers = {
+            'Authorization': f'Basic {basic_auth}',
+            'User-Agent': self.user_agent,
+            'Content-Type': 'application/x-www-form-urlencoded'
+        }
         
     async def start_session(self):
-        """Start HTTP session and authenticate"""
-        if not self.session:
-            self.session = aiohttp.ClientSession()
+        """Attach the shared HTTP session and authenticate if needed"""
+        self.session = await get_session()
         
-        if self.client_id != 'demo_client':
-            await self._authenticate()
+        if self.client_id != 'demo_client' and not self.access_token:
+            # Concurrent requests share a single token exchange
+            async with self._auth_lock:
+                if not self.access_token:
+                    await self._authenticate()
     
     async def close_session(self):
-        """Close HTTP session"""
-        if self.session:
-            await self.session.close()
-            self.session = None
+        """Release the shared HTTP session (closed at application shutdown)"""
+        self.session = None
     
     async def _authenticate(self):
         """Authenticate with Reddit API"""
         try:
-            # Prepare authentication
-            auth_string = f"{self.client_id}:{self.client_secret}"
-            auth_bytes = auth_string.encode('ascii')
-            auth_b64 = base64.b64encode(auth_bytes).decode('ascii')
-            
-            headers = {
-                'Authorization': f'Basic {auth_b64}',
-                'User-Agent': self.user_agent
-            }
-            
-            data = {
-                'grant_type': 'client_credentials'
-            }
-            
-            async with self.session.post(self.auth_url, headers=headers, data=data) as response:
-                if response.status == 200:
-                    token_data = await response.json()
-                    self.access_token = token_data['access_token']
-                    logger.info("Reddit API authentication successful")
-                else:
+            async with self.session.post(self.auth_url, headers=self._token_headers,
+                                         data=self._TOKEN_REQUEST_BODY) as response:
+                if not response.ok:
+                    response.release()
                     logger.error(f"Reddit authentication failed: {response.status}")
+                    return
+                
+                token_data = orjson.loads(await response.read())
+                self.access_token = token_data['access_token']
+                self._auth_headers = {
+                    'Authorization': f'Bearer {self.access_token}',
+                    'User-Agent': self.user_agent
+                }
+                logger.info("Reddit API authentication successful")
         except Exception as e:
             logger.error(f"Error authenticating with Reddit: {e}")
     
@@ -76,23 +109,40 @@ class RedditAPIClient:
         
         try:
             url = f"{self.base_url}/r/{subreddit}/{sort}"
-            headers = {
-                'Authorization': f'Bearer {self.access_token}',
-                'User-Agent': self.user_agent
-            }
-            
             params = {
                 'limit': min(limit, 100),
                 't': time_filter
             }
             
+            # Revalidate the last listing so an unchanged one skips download and parsing
+            cache_key = (url, params['limit'], time_filter)
+            cached = self._listing_cache.get(cache_key)
+            headers = {**self._auth_headers, 'If-None-Match': cached[0]} if cached else self._auth_headers
+            
             async with self.session.get(url, headers=headers, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return self._parse_reddit_posts(data, subreddit)
-                else:
+                if response.status == 304 and cached:
+                    self._listing_cache.move_to_end(cache_key)
+                    return list(cached[1])
+                
+                if not response.ok:
+                    response.release()
+                    if response.status == 401:
+                        # Token expired; authenticate again on the next call
+                        self.access_token = None
                     logger.error(f"Reddit API error: {response.status}")
                     return []
+                
+                data = orjson.loads(await response.read())
+                posts = self._parse_reddit_posts(data, subreddit)
+                
+                etag = response.headers.get('ETag')
+                if etag:
+                    self._listing_cache[cache_key] = (etag, posts)
+                    self._listing_cache.move_to_end(cache_key)
+                    while len(self._listing_cache) > MAX_LISTING_CACHE_ENTRIES:
+                        self._listing_cache.popitem(last=False)
+                
+                return posts
         except Exception as e:
             logger.error(f"Error fetching Reddit posts: {e}")
             return []
@@ -107,20 +157,19 @@ class RedditAPIClient:
         
         try:
             url = f"{self.base_url}/r/{subreddit}/comments/{post_id}"
-            headers = {
-                'Authorization': f'Bearer {self.access_token}',
-                'User-Agent': self.user_agent
-            }
-            
             params = {'limit': limit}
             
-            async with self.session.get(url, headers=headers, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return self._parse_reddit_comments(data, subreddit)
-                else:
+            async with self.session.get(url, headers=self._auth_headers, params=params) as response:
+                if not response.ok:
+                    response.release()
+                    if response.status == 401:
+                        # Token expired; authenticate again on the next call
+                        self.access_token = None
                     logger.error(f"Reddit comments API error: {response.status}")
                     return []
+                
+                data = orjson.loads(await response.read())
+                return self._parse_reddit_comments(data, subreddit)
         except Exception as e:
             logger.error(f"Error fetching Reddit comments: {e}")
             return []
@@ -129,19 +178,37 @@ class RedditAPIClient:
         """Stream data from multiple subreddits"""
         while True:
             try:
-                for subreddit in subreddits:
-                    posts = await self.get_subreddit_posts(subreddit, limit=10)
+                # Fetch every subreddit concurrently
+                post_lists = await asyncio.gather(
+                    *(self._limited(self.get_subreddit_posts(subreddit, limit=10)) for subreddit in subreddits),
+                    return_exceptions=True
+                )
+                
+                # Then fetch comments for the most recent post of each subreddit
+                comment_requests = []
+                for subreddit, posts in zip(subreddits, post_lists):
+                    if isinstance(posts, Exception):
+                        logger.error(f"Error fetching r/{subreddit}: {posts}")
+                        continue
+                    
                     for post in posts:
                         yield post
                     
-                    # Get some comments from recent posts
                     if posts:
-                        recent_post = posts[0]
-                        post_id = recent_post.metadata.get('post_id')
+                        post_id = posts[0].metadata.get('post_id')
                         if post_id:
-                            comments = await self.get_post_comments(subreddit, post_id, limit=5)
-                            for comment in comments:
-                                yield comment
+                            comment_requests.append(
+                                self._limited(self.get_post_comments(subreddit, post_id, limit=5))
+                            )
+                
+                comment_lists = await asyncio.gather(*comment_requests, return_exceptions=True)
+                for comments in comment_lists:
+                    if isinstance(comments, Exception):
+                        logger.error(f"Error fetching Reddit comments: {comments}")
+                        continue
+                    
+                    for comment in comments:
+                        yield comment
                 
                 # Wait before next fetch
                 await asyncio.sleep(300)  # 5 minutes between fetches
@@ -150,6 +217,11 @@ class RedditAPIClient:
                 logger.error(f"Error in Reddit stream: {e}")
                 await asyncio.sleep(60)
     
+    async def _limited(self, request):
+        """Await a request while holding one of the concurrency slots"""
+        async with self._request_slots:
+            return await request
+    
     def _parse_reddit_posts(self, data: Dict, subreddit: str) -> List[RawData]:
         """Parse Reddit API response for posts"""
         raw_data_list = []
@@ -157,40 +229,49 @@ class RedditAPIClient:
         try:
             posts = data['data']['children']
             
+            # Bind loop-invariant lookups once per batch
+            append = raw_data_list.append
+            fromtimestamp = datetime.fromtimestamp
+            source = DataSource.REDDIT
+            
             for post_data in posts:
                 post = post_data['data']
+                post_get = post.get
                 
                 # Skip removed or deleted posts
-                if post.get('removed_by_category') or post.get('selftext') == '[deleted]':
+                selftext = post_get('selftext')
+                if selftext in _REMOVED_BODIES or post_get('removed_by_category'):
                     continue
                 
                 # Combine title and selftext
-                content = post['title']
-                if post.get('selftext'):
-                    content += f" {post['selftext']}"
+                title = post['title']
+                content = f"{title} {selftext}" if selftext else title
                 
                 # Parse timestamp
-                timestamp = datetime.fromtimestamp(post['created_utc'])
+                timestamp = fromtimestamp(post['created_utc'])
+                
+                post_id = post['id']
+                raw_id = f"reddit_post_{post_id}"
+                author = post_get('author', 'unknown')
+                metadata = {
+                    'subreddit': subreddit,
+                    'post_id': post_id,
+                    'score': post_get('score', 0),
+                    'upvote_ratio': post_get('upvote_ratio', 0.5),
+                    'num_comments': post_get('num_comments', 0),
+                    'url': post_get('url', ''),
+                    'flair': post_get('link_flair_text', ''),
+                    'post_type': 'post'
+                }
                 
-                raw_data = RawData(
-                    id=f"reddit_post_{post['id']}",
-                    source=DataSource.REDDIT,
+                append(RawData(
+                    id=raw_id,
+                    source=source,
                     timestamp=timestamp,
                     content=content,
-                    author=post.get('author', 'unknown'),
-                    metadata={
-                        'subreddit': subreddit,
-                        'post_id': post['id'],
-                        'score': post.get('score', 0),
-                        'upvote_ratio': post.get('upvote_ratio', 0.5),
-                        'num_comments': post.get('num_comments', 0),
-                        'url': post.get('url', ''),
-                        'flair': post.get('link_flair_text', ''),
-                        'post_type': 'post'
-                    }
-                )
-                
-                raw_data_list.append(raw_data)
+                    author=author,
+                    metadata=metadata
+                ))
                 
         except Exception as e:
             logger.error(f"Error parsing Reddit posts: {e}")
@@ -206,35 +287,43 @@ class RedditAPIClient:
             if len(data) > 1:
                 comments = data[1]['data']['children']
                 
+                # Bind loop-invariant lookups once per batch
+                append = raw_data_list.append
+                fromtimestamp = datetime.fromtimestamp
+                source = DataSource.REDDIT
+                
                 for comment_data in comments:
                     if comment_data['kind'] != 't1':  # Skip non-comment items
                         continue
                     
                     comment = comment_data['data']
+                    comment_get = comment.get
                     
                     # Skip removed or deleted comments
-                    if comment.get('body') in ['[deleted]', '[removed]']:
+                    body = comment_get('body')
+                    if body in _REMOVED_BODIES:
                         continue
                     
                     # Parse timestamp
-                    timestamp = datetime.fromtimestamp(comment['created_utc'])
+                    timestamp = fromtimestamp(comment['created_utc'])
                     
+                    comment_id = comment['id']
                     raw_data = RawData(
-                        id=f"reddit_comment_{comment['id']}",
-                        source=DataSource.REDDIT,
+                        id=f"reddit_comment_{comment_id}",
+                        source=source,
                         timestamp=timestamp,
-                        content=comment['body'],
-                        author=comment.get('author', 'unknown'),
+                        content=body,
+                        author=comment_get('author', 'unknown'),
                         metadata={
                             'subreddit': subreddit,
-                            'comment_id': comment['id'],
-                            'score': comment.get('score', 0),
-                            'parent_id': comment.get('parent_id', ''),
+                            'comment_id': comment_id,
+                            'score': comment_get('score', 0),
+                            'parent_id': comment_get('parent_id', ''),
                             'post_type': 'comment'
                         }
                     )
                     
-                    raw_data_list.append(raw_data)
+                    append(raw_data)
                     
         except Exception as e:
             logger.error(f"Error parsing Reddit comments: {e}")
@@ -256,21 +345,31 @@ class RedditAPIClient:
             "This volatility is exactly why crypto isn't for everyone"
         ]
         
-        import random
+        subreddits = _MOCK_SUBREDDITS
+        
+        # Draw every random pick for the batch at once
+        post_idx = _rng.integers(0, len(mock_posts), count).tolist()
+        author_ids = _rng.integers(1000, 9999, count, endpoint=True).tolist()
+        subreddit_idx = _rng.integers(0, len(subreddits), count).tolist()
+        scores = _rng.integers(-10, 100, count, endpoint=True).tolist()
+        upvote_ratios = _rng.uniform(0.5, 0.95, count).tolist()
+        num_comments = _rng.integers(0, 50, count, endpoint=True).tolist()
+        now = datetime.now()
+        base_ts = time.monotonic_ns()
+        
         posts = []
         for i in range(count):
-            post_text = random.choice(mock_posts)
             posts.append(RawData(
-                id=f"mock_reddit_post_{datetime.now().timestamp()}_{i}",
+                id=f"mock_reddit_post_{base_ts}_{next(_mock_seq)}",
                 source=DataSource.REDDIT,
-                timestamp=datetime.now(),
-                content=post_text,
-                author=f"redditor_{random.randint(1000, 9999)}",
+                timestamp=now,
+                content=mock_posts[post_idx[i]],
+                author=f"redditor_{author_ids[i]}",
                 metadata={
-                    'subreddit': random.choice(data_config.REDDIT_SUBREDDITS),
-                    'score': random.randint(-10, 100),
-                    'upvote_ratio': random.uniform(0.5, 0.95),
-                    'num_comments': random.randint(0, 50),
+                    'subreddit': subreddits[subreddit_idx[i]],
+                    'score': scores[i],
+                    'upvote_ratio': upvote_ratios[i],
+                    'num_comments': num_comments[i],
                     'post_type': 'post'
                 }
             ))
@@ -292,19 +391,27 @@ class RedditAPIClient:
             "Time in the market beats timing the market"
         ]
         
-        import random
+        subreddits = _MOCK_SUBREDDITS
+        
+        # Draw every random pick for the batch at once
+        comment_idx = _rng.integers(0, len(mock_comments), count).tolist()
+        author_ids = _rng.integers(1000, 9999, count, endpoint=True).tolist()
+        subreddit_idx = _rng.integers(0, len(subreddits), count).tolist()
+        scores = _rng.integers(-5, 25, count, endpoint=True).tolist()
+        now = datetime.now()
+        base_ts = time.monotonic_ns()
+        
         comments = []
         for i in range(count):
-            comment_text = random.choice(mock_comments)
             comments.append(RawData(
-                id=f"mock_reddit_comment_{datetime.now().timestamp()}_{i}",
+                id=f"mock_reddit_comment_{base_ts}_{next(_mock_seq)}",
                 source=DataSource.REDDIT,
-                timestamp=datetime.now(),
-                content=comment_text,
-                author=f"commenter_{random.randint(1000, 9999)}",
+                timestamp=now,
+                content=mock_comments[comment_idx[i]],
+                author=f"commenter_{author_ids[i]}",
                 metadata={
-                    'subreddit': random.choice(data_config.REDDIT_SUBREDDITS),
-                    'score': random.randint(-5, 25),
+                    'subreddit': subreddits[subreddit_idx[i]],
+                    'score': scores[i],
                     'post_type': 'comment'
                 }
             ))
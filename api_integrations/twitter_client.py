@@ -3,16 +3,36 @@ Twitter API v2 integration for real-time sentiment data
 """
 import asyncio
 import aiohttp
+import itertools
 import logging
+import time
 from datetime import datetime
+from types import MappingProxyType
 from typing import AsyncGenerator, List, Dict, Optional
-import json
+import numpy as np
+import orjson
 
+from api_integrations._session import get_session
 from config import api_config, data_config
 from core.data_models import RawData, DataSource
 
 logger = logging.getLogger(__name__)
 
+# Random generator for mock data
+_rng = np.random.default_rng()
+
+# Sequence that keeps mock IDs unique within the process
+_mock_seq = itertools.count()
+
+# Bytes read from the filtered stream per chunk
+STREAM_CHUNK_SIZE = 65536
+
+# Mock tweets generated per batch by the demo stream
+MOCK_STREAM_BATCH_SIZE = 256
+
+# Stand-in for tweets whose 'public_metrics' is missing or null
+_EMPTY_METRICS = MappingProxyType({})
+
 class TwitterAPIClient:
     """Twitter API v2 client for real-time data streaming"""
     
@@ -21,21 +41,17 @@ class TwitterAPIClient:
         self.base_url = "https://api.twitter.com/2"
         self.session: Optional[aiohttp.ClientSession] = None
         self.is_streaming = False
+        # Sent per request so the HTTP session can be shared with other clients
+        self._auth_headers = {"Authorization": f"Bearer {self.bearer_token}"}
+        self._json_headers = {**self._auth_headers, "Content-Type": "application/json"}
         
     async def start_session(self):
-        """Start HTTP session"""
-        if not self.session:
-            headers = {
-                "Authorization": f"Bearer {self.bearer_token}",
-                "Content-Type": "application/json"
-            }
-            self.session = aiohttp.ClientSession(headers=headers)
+        """Attach the shared HTTP session"""
+        self.session = await get_session()
     
     async def close_session(self):
-        """Close HTTP session"""
-        if self.session:
-            await self.session.close()
-            self.session = None
+        """Release the shared HTTP session (closed at application shutdown)"""
+        self.session = None
     
     async def search_recent_tweets(self, query: str, max_results: int = 100) -> List[RawData]:
         """Search for recent tweets matching query"""
@@ -54,13 +70,14 @@ class TwitterAPIClient:
                 "user.fields": "username,verified,public_metrics"
             }
             
-            async with self.session.get(url, params=params) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    return self._parse_twitter_response(data)
-                else:
+            async with self.session.get(url, headers=self._auth_headers, params=params) as response:
+                if not response.ok:
+                    response.release()
                     logger.error(f"Twitter API error: {response.status}")
                     return []
+                
+                data = orjson.loads(await response.read())
+                return self._parse_twitter_response(data)
         except Exception as e:
             logger.error(f"Error fetching tweets: {e}")
             return []
@@ -86,24 +103,39 @@ class TwitterAPIClient:
                 "user.fields": "username,verified,public_metrics"
             }
             
+            # The stream stays open indefinitely; Twitter sends a keep-alive every 20s
+            timeout = aiohttp.ClientTimeout(total=None, sock_read=90)
+            
             self.is_streaming = True
-            async with self.session.get(url, params=params) as response:
-                if response.status == 200:
-                    async for line in response.content:
-                        if not self.is_streaming:
-                            break
-                        
-                        if line:
-                            try:
-                                tweet_data = json.loads(line.decode('utf-8'))
-                                if 'data' in tweet_data:
-                                    raw_data = self._parse_single_tweet(tweet_data)
-                                    if raw_data:
-                                        yield raw_data
-                            except json.JSONDecodeError:
-                                continue
-                else:
+            async with self.session.get(url, headers=self._auth_headers, params=params, timeout=timeout) as response:
+                if not response.ok:
+                    response.release()
                     logger.error(f"Twitter stream error: {response.status}")
+                    return
+                
+                # Read in large chunks and split the NDJSON lines ourselves so a
+                # burst of tweets costs one read instead of one per line
+                buffer = b''
+                async for chunk in response.content.iter_chunked(STREAM_CHUNK_SIZE):
+                    if not self.is_streaming:
+                        break
+                    
+                    *lines, buffer = (buffer + chunk).split(b'\n')
+                    for line in lines:
+                        # Skip keep-alive newlines
+                        if not line.strip():
+                            continue
+                        
+                        try:
+                            tweet_data = orjson.loads(line)
+                        except orjson.JSONDecodeError:
+                            continue
+                        
+                        tweet = tweet_data.get('data')
+                        if tweet:
+                            raw_data = self._build_raw_data_from_tweet(tweet, self._usernames(tweet_data))
+                            if raw_data:
+                                yield raw_data
         except Exception as e:
             logger.error(f"Error in Twitter stream: {e}")
         finally:
@@ -114,19 +146,24 @@ class TwitterAPIClient:
         url = f"{self.base_url}/tweets/search/stream/rules"
         
         # Get existing rules
-        async with self.session.get(url) as response:
-            if response.status == 200:
-                existing_rules = await response.json()
-                
-                # Delete existing rules if any
-                if existing_rules.get('data'):
-                    rule_ids = [rule['id'] for rule in existing_rules['data']]
-                    delete_payload = {"delete": {"ids": rule_ids}}
-                    await self.session.post(url, json=delete_payload)
+        async with self.session.get(url, headers=self._auth_headers) as response:
+            if not response.ok:
+                response.release()
+                existing_rules = {}
+            else:
+                existing_rules = orjson.loads(await response.read())
+        
+        # Delete existing rules if any
+        if existing_rules.get('data'):
+            rule_ids = [rule['id'] for rule in existing_rules['data']]
+            delete_body = orjson.dumps({"delete": {"ids": rule_ids}})
+            async with self.session.post(url, headers=self._json_headers, data=delete_body) as response:
+                if not response.ok:
+                    logger.error(f"Failed to delete stream rules: {response.status}")
         
         # Add new rules
-        add_payload = {"add": rules}
-        async with self.session.post(url, json=add_payload) as response:
+        add_body = orjson.dumps({"add": rules})
+        async with self.session.post(url, headers=self._json_headers, data=add_body) as response:
             if response.status == 201:
                 logger.info("Twitter stream rules added successfully")
             else:
@@ -137,35 +174,40 @@ class TwitterAPIClient:
         raw_data_list = []
         
         tweets = data.get('data', [])
-        users = {user['id']: user for user in data.get('includes', {}).get('users', [])}
+        usernames = self._usernames(data)
+        now = datetime.now()
         
         for tweet in tweets:
-            raw_data = self._parse_single_tweet({'data': tweet}, users)
+            raw_data = self._build_raw_data_from_tweet(tweet, usernames, now)
             if raw_data:
                 raw_data_list.append(raw_data)
         
         return raw_data_list
     
-    def _parse_single_tweet(self, tweet_data: Dict, users: Dict = None) -> Optional[RawData]:
-        """Parse a single tweet into RawData"""
+    @staticmethod
+    def _usernames(data: Dict) -> Dict[str, str]:
+        """Map author IDs to usernames from a payload's expanded users"""
+        includes = data.get('includes')
+        if not includes:
+            return {}
+        return {user['id']: user.get('username') for user in includes.get('users', ())}
+    
+    def _build_raw_data_from_tweet(self, tweet: Dict, usernames: Dict = None,
+                                   now: Optional[datetime] = None) -> Optional[RawData]:
+        """Parse a single tweet object into RawData"""
         try:
-            tweet = tweet_data['data']
-            author_id = tweet.get('author_id')
+            tweet_get = tweet.get
+            author_id = tweet_get('author_id')
             
             # Get user info if available
-            author_username = None
-            if users and author_id in users:
-                author_username = users[author_id].get('username')
+            author_username = usernames.get(author_id) if usernames else None
             
             # Parse timestamp
-            created_at = tweet.get('created_at')
-            if created_at:
-                timestamp = datetime.fromisoformat(created_at.replace('Z', '+00:00'))
-            else:
-                timestamp = datetime.now()
+            created_at = tweet_get('created_at')
+            timestamp = datetime.fromisoformat(created_at) if created_at else (now or datetime.now())
             
             # Extract metrics
-            metrics = tweet.get('public_metrics', {})
+            metrics_get = (tweet_get('public_metrics') or _EMPTY_METRICS).get
             
             return RawData(
                 id=f"twitter_{tweet['id']}",
@@ -174,11 +216,11 @@ class TwitterAPIClient:
                 content=tweet['text'],
                 author=author_username or author_id,
                 metadata={
-                    'retweet_count': metrics.get('retweet_count', 0),
-                    'like_count': metrics.get('like_count', 0),
-                    'reply_count': metrics.get('reply_count', 0),
-                    'quote_count': metrics.get('quote_count', 0),
-                    'context_annotations': tweet.get('context_annotations', [])
+                    'retweet_count': metrics_get('retweet_count', 0),
+                    'like_count': metrics_get('like_count', 0),
+                    'reply_count': metrics_get('reply_count', 0),
+                    'quote_count': metrics_get('quote_count', 0),
+                    'context_annotations': tweet_get('context_annotations', [])
                 }
             )
         except Exception as e:
@@ -200,21 +242,29 @@ class TwitterAPIClient:
             "Technical analysis suggests we might see $100k Bitcoin soon 🎯 #BTC #TA"
         ]
         
-        import random
+        # Draw every random pick for the batch at once
+        tweet_idx = _rng.integers(0, len(mock_tweets), count).tolist()
+        author_ids = _rng.integers(1000, 9999, count, endpoint=True).tolist()
+        retweets = _rng.integers(0, 100, count, endpoint=True).tolist()
+        likes = _rng.integers(0, 500, count, endpoint=True).tolist()
+        replies = _rng.integers(0, 50, count, endpoint=True).tolist()
+        quotes = _rng.integers(0, 20, count, endpoint=True).tolist()
+        now = datetime.now()
+        base_ts = time.monotonic_ns()
+        
         tweets = []
         for i in range(count):
-            tweet_text = random.choice(mock_tweets)
             tweets.append(RawData(
-                id=f"mock_twitter_{datetime.now().timestamp()}_{i}",
+                id=f"mock_twitter_{base_ts}_{next(_mock_seq)}",
                 source=DataSource.TWITTER,
-                timestamp=datetime.now(),
-                content=tweet_text,
-                author=f"user_{random.randint(1000, 9999)}",
+                timestamp=now,
+                content=mock_tweets[tweet_idx[i]],
+                author=f"user_{author_ids[i]}",
                 metadata={
-                    'retweet_count': random.randint(0, 100),
-                    'like_count': random.randint(0, 500),
-                    'reply_count': random.randint(0, 50),
-                    'quote_count': random.randint(0, 20)
+                    'retweet_count': retweets[i],
+                    'like_count': likes[i],
+                    'reply_count': replies[i],
+                    'quote_count': quotes[i]
                 }
             ))
         
@@ -222,11 +272,19 @@ class TwitterAPIClient:
     
     async def _stream_mock_tweets(self) -> AsyncGenerator[RawData, None]:
         """Stream mock tweets for demo"""
+        self.is_streaming = True
         while self.is_streaming:
-            tweets = await self._generate_mock_tweets(1)
-            if tweets:
-                yield tweets[0]
-            await asyncio.sleep(random.uniform(2, 8))
+            # Generate tweets and pauses a batch at a time rather than per tweet
+            tweets = await self._generate_mock_tweets(MOCK_STREAM_BATCH_SIZE)
+            intervals = _rng.uniform(2, 8, MOCK_STREAM_BATCH_SIZE).tolist()
+            
+            for tweet, interval in zip(tweets, intervals):
+                if not self.is_streaming:
+                    break
+                
+                tweet.timestamp = datetime.now()
+                yield tweet
+                await asyncio.sleep(interval)
     
     def stop_streaming(self):
         """Stop the streaming process"""
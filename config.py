@@ -3,13 +3,15 @@ Configuration settings for the Fear & Greed Sentiment Engine
 """
 import os
 from dataclasses import dataclass
-from typing import Dict, List
+from typing import FrozenSet, Tuple
 from dotenv import load_dotenv
-from supabase import create_client, Client
 
-load_dotenv()
+# Worker processes inherit the parent's environment, so parse .env only once
+if not os.environ.get('_DOTENV_LOADED'):
+    load_dotenv()
+    os.environ['_DOTENV_LOADED'] = '1'
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class APIConfig:
     """API configuration settings"""
     # Social Media APIs (use environment variables for production)
@@ -31,16 +33,18 @@ class APIConfig:
     # Hugging Face (for advanced models)
     HUGGINGFACE_TOKEN: str = os.getenv('HUGGINGFACE_TOKEN', '')
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class ProcessingConfig:
     """Data processing configuration"""
     # Sentiment Analysis
     SENTIMENT_MODEL: str = "nlptown/bert-base-multilingual-uncased-sentiment"
     FINANCIAL_MODEL: str = "ProsusAI/finbert"
+    QUANTIZED_MODEL_DIR: str = os.getenv('QUANTIZED_MODEL_DIR', '.models/finbert-int8')
     
     # Processing Parameters
     MAX_TEXT_LENGTH: int = 512
     BATCH_SIZE: int = 32
+    SENTIMENT_CACHE_SIZE: int = 50000  # results kept for repeated content (retweets, quotes)
     SENTIMENT_THRESHOLD: float = 0.6
     
     # Time Windows
@@ -49,7 +53,7 @@ class ProcessingConfig:
     MEDIUM_TERM_WINDOW: int = 3600  # 1 hour
     LONG_TERM_WINDOW: int = 86400  # 1 day
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class TradingConfig:
     """Trading signal configuration"""
     # Fear & Greed Index Thresholds
@@ -69,44 +73,28 @@ class TradingConfig:
     MAX_DAILY_LOSS: float = 0.02  # 2%
     MAX_CORRELATION_EXPOSURE: float = 0.3  # 30%
 
-@dataclass
+@dataclass(frozen=True, slots=True)
 class DataConfig:
     """Data sources and targets configuration"""
     # Supported Assets
-    CRYPTO_SYMBOLS: List[str] = None
-    STOCK_SYMBOLS: List[str] = None
+    CRYPTO_SYMBOLS: Tuple[str, ...] = ('BTC', 'ETH', 'ADA', 'SOL', 'MATIC', 'DOGE', 'XRP')
+    STOCK_SYMBOLS: Tuple[str, ...] = ('AAPL', 'GOOGL', 'MSFT', 'TSLA', 'AMZN', 'NVDA', 'META')
     
     # Social Media Sources
-    TWITTER_KEYWORDS: List[str] = None
-    REDDIT_SUBREDDITS: List[str] = None
+    TWITTER_KEYWORDS: Tuple[str, ...] = (
+        'bitcoin', 'crypto', 'blockchain', 'defi', 'nft',
+        'stocks', 'trading', 'investing', 'market', 'bull', 'bear'
+    )
+    REDDIT_SUBREDDITS: FrozenSet[str] = frozenset((
+        'cryptocurrency', 'bitcoin', 'investing', 'stocks', 
+        'wallstreetbets', 'ethfinance', 'defi'
+    ))
     
     # News Sources
-    NEWS_SOURCES: List[str] = None
-    
-    def __post_init__(self):
-        if self.CRYPTO_SYMBOLS is None:
-            self.CRYPTO_SYMBOLS = ['BTC', 'ETH', 'ADA', 'SOL', 'MATIC', 'DOGE', 'XRP']
-        
-        if self.STOCK_SYMBOLS is None:
-            self.STOCK_SYMBOLS = ['AAPL', 'GOOGL', 'MSFT', 'TSLA', 'AMZN', 'NVDA', 'META']
-        
-        if self.TWITTER_KEYWORDS is None:
-            self.TWITTER_KEYWORDS = [
-                'bitcoin', 'crypto', 'blockchain', 'defi', 'nft',
-                'stocks', 'trading', 'investing', 'market', 'bull', 'bear'
-            ]
-        
-        if self.REDDIT_SUBREDDITS is None:
-            self.REDDIT_SUBREDDITS = [
-                'cryptocurrency', 'bitcoin', 'investing', 'stocks', 
-                'wallstreetbets', 'ethfinance', 'defi'
-            ]
-        
-        if self.NEWS_SOURCES is None:
-            self.NEWS_SOURCES = [
-                'reuters', 'bloomberg', 'cnbc', 'marketwatch', 
-                'coindesk', 'cointelegraph', 'decrypt'
-            ]
+    NEWS_SOURCES: FrozenSet[str] = frozenset((
+        'reuters', 'bloomberg', 'cnbc', 'marketwatch', 
+        'coindesk', 'cointelegraph', 'decrypt'
+    ))
 
 # Global configuration instances
 api_config = APIConfig()
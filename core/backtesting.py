@@ -7,53 +7,201 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
-from dataclasses import asdict
 import json
 
+try:
+    from numba import njit, prange
+except ImportError:
+    prange = range
+    
+    def njit(*args, **kwargs):
+        """Fallback when numba is not installed: run kernels as plain Python"""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
 from core.data_models import TradingSignal, BacktestResult, SignalType, MarketData
 from config import trading_config
 
 logger = logging.getLogger(__name__)
 
+# Simulation bar size; mock market data is generated on the same grid
+BAR_MINUTES = 5
+
+# Max holding period before a position is closed at market
+MAX_HOLD_NS = 24 * 3600 * 10**9
+
+# Simulation clock: naive wall-clock datetimes as int64 nanoseconds since the epoch
+_EPOCH = datetime(1970, 1, 1)
+_ONE_US = timedelta(microseconds=1)
+
+# Integer side codes, resolved once per signal instead of comparing SignalType members
+SIDE_BUY, SIDE_SELL, SIDE_HOLD = 1, -1, 0
+_SIDE_CODES = {SignalType.BUY: SIDE_BUY, SignalType.SELL: SIDE_SELL, SignalType.HOLD: SIDE_HOLD}
+
+# Exit reason codes returned by the position update kernel
+EXIT_NONE, EXIT_TIME, EXIT_STOP_LOSS, EXIT_TAKE_PROFIT = 0, 1, 2, 3
+EXIT_REASONS = ('', 'time_exit', 'stop_loss', 'take_profit')
+
+# Per-position columns kept by Portfolio, one row per position slot
+_POSITION_COLUMNS = (
+    ('_open', np.bool_),
+    ('_sym_id', np.int32),
+    ('_entry_px', np.float64),
+    ('_entry_ns', np.int64),
+    ('_side', np.int8),
+    ('_stop', np.float64),
+    ('_tp', np.float64),
+    ('_size', np.float64),
+    ('_mfe', np.float64),
+    ('_mae', np.float64),
+)
+
+def _to_ns(timestamp: datetime) -> int:
+    """Convert a datetime to simulation-clock nanoseconds"""
+    return (timestamp - _EPOCH) // _ONE_US * 1000
+
+def _from_ns(timestamp_ns: int) -> datetime:
+    """Convert simulation-clock nanoseconds back to a datetime"""
+    return _EPOCH + timedelta(microseconds=timestamp_ns // 1000)
+
+@njit(parallel=True, cache=True)
+def _random_walk(returns: np.ndarray, start_prices: np.ndarray, out: np.ndarray):
+    """Compound per-step returns into price paths, one column per symbol (columns run in parallel)"""
+    for s in prange(out.shape[1]):
+        price = start_prices[s]
+        for t in range(out.shape[0]):
+            price *= 1.0 + float(returns[t, s])
+            # Ensure price doesn't go negative
+            if price < 0.01:
+                price = 0.01
+            out[t, s] = price
+
+@njit(cache=True)
+def _advance_kernel(prices: np.ndarray, start_ns: int, step_ns: int, capital: float,
+                    is_open: np.ndarray, sym_id: np.ndarray, entry_px: np.ndarray,
+                    entry_ns: np.ndarray, side: np.ndarray, stop: np.ndarray,
+                    tp: np.ndarray, size: np.ndarray, mfe: np.ndarray, mae: np.ndarray,
+                    equity: np.ndarray, closed_tick: np.ndarray, closed_slot: np.ndarray,
+                    closed_code: np.ndarray, closed_return: np.ndarray) -> Tuple[float, int]:
+    """Run the portfolio over a block of ticks with no new signals.
+    
+    prices is (ticks, symbols) with columns in symbol id order. Every tick marks
+    the open positions to market, closes the ones that hit an exit (settling
+    their PnL into capital in slot order) and writes that tick's equity. Closed
+    positions are logged to the closed_* arrays, which need room for one entry
+    per open position. Returns the final capital and the number of closures.
+    """
+    n_ticks, n_cols = prices.shape
+    n_closed = 0
+    for t in range(n_ticks):
+        now_ns = start_ns + t * step_ns
+        open_unrealized = 0.0
+        for i in range(is_open.shape[0]):
+            if not is_open[i] or sym_id[i] >= n_cols:
+                continue
+            
+            # Missing prices are NaN: leave the position untouched this tick
+            price = prices[t, sym_id[i]]
+            if price != price:
+                continue
+            
+            # Excursions only ever widen, so max/min replace the favorable/adverse branches
+            unrealized = side[i] * (price - entry_px[i]) / entry_px[i]
+            mfe[i] = max(mfe[i], unrealized)
+            mae[i] = min(mae[i], unrealized)
+            
+            # Unset stop/take-profit levels are NaN and never compare true
+            if now_ns - entry_ns[i] > MAX_HOLD_NS:
+                code = EXIT_TIME
+            elif side[i] * (price - stop[i]) <= 0:
+                code = EXIT_STOP_LOSS
+            elif side[i] * (price - tp[i]) >= 0:
+                code = EXIT_TAKE_PROFIT
+            else:
+                open_unrealized += unrealized * size[i]
+                continue
+            
+            is_open[i] = False
+            pnl_amount = unrealized * size[i] * capital
+            capital += pnl_amount
+            closed_tick[n_closed] = t
+            closed_slot[n_closed] = i
+            closed_code[n_closed] = code
+            closed_return[n_closed] = pnl_amount / capital
+            n_closed += 1
+        
+        # Unrealized PnL of the survivors is marked against the settled capital
+        equity[t] = capital * (1 + open_unrealized)
+    
+    return capital, n_closed
+
 class MockMarketData:
     """Generate mock market data for backtesting"""
     
-    def __init__(self, symbols: List[str]):
+    def __init__(self, symbols: List[str], seed: Optional[int] = None):
         self.symbols = symbols
-        self.current_prices = {symbol: np.random.uniform(100, 50000) for symbol in symbols}
-        self.volatilities = {symbol: np.random.uniform(0.02, 0.05) for symbol in symbols}
+        # One PCG64 generator for every draw; pass a seed for reproducible runs
+        self.rng = np.random.default_rng(seed)
+        self.current_prices = dict(zip(symbols, self.rng.uniform(100, 50000, len(symbols)).tolist()))
+        self.volatilities = dict(zip(symbols, self.rng.uniform(0.02, 0.05, len(symbols)).tolist()))
     
     def generate_price_data(self, start_date: datetime, end_date: datetime, 
-                          frequency_minutes: int = 5) -> Dict[str, List[MarketData]]:
-        """Generate mock price data for backtesting"""
-        data = {symbol: [] for symbol in self.symbols}
-        
-        current_date = start_date
-        while current_date <= end_date:
-            for symbol in self.symbols:
-                # Random walk with some mean reversion
-                change = np.random.normal(0, self.volatilities[symbol])
-                self.current_prices[symbol] *= (1 + change)
-                
-                # Ensure price doesn't go negative
-                self.current_prices[symbol] = max(self.current_prices[symbol], 0.01)
-                
-                volume = np.random.uniform(1000000, 100000000)
-                change_24h = np.random.uniform(-0.15, 0.15)
-                
-                market_data = MarketData(
-                    symbol=symbol,
-                    timestamp=current_date,
-                    price=self.current_prices[symbol],
-                    volume=volume,
-                    change_24h=change_24h
-                )
-                
-                data[symbol].append(market_data)
-            
-            current_date += timedelta(minutes=frequency_minutes)
-        
-        return data
+                          frequency_minutes: int = 5
+                          ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, Dict[str, int]]:
+        """Generate mock price data for backtesting.
+        
+        Returns datetime64[ns] bar timestamps, float32 price, volume and 24h change
+        arrays of shape (steps, symbols), and the symbol -> column index. Use
+        market_data_from_arrays when MarketData objects are needed.
+        """
+        step = timedelta(minutes=frequency_minutes)
+        n_steps = max((end_date - start_date) // step + 1, 0)
+        timestamps = np.datetime64(start_date, 'ns') + np.arange(n_steps) * np.timedelta64(step)
+        n_symbols = len(self.symbols)
+        
+        # Random walk for every symbol at once: one column per symbol
+        sigmas = np.array([self.volatilities[symbol] for symbol in self.symbols])
+        returns = self.rng.standard_normal((n_steps, n_symbols), dtype=np.float32) * sigmas.astype(np.float32)
+        start_prices = np.array([self.current_prices[symbol] for symbol in self.symbols])
+        
+        # The walk compounds in float64 so it doesn't drift, but is stored as float32:
+        # the simulation only ever reads these, and capital/equity stay float64
+        prices = np.empty((n_steps, n_symbols), dtype=np.float32)
+        _random_walk(returns, start_prices, prices)
+        
+        volumes = self.rng.random((n_steps, n_symbols), dtype=np.float32)
+        volumes *= 100000000 - 1000000
+        volumes += 1000000
+        changes_24h = self.rng.random((n_steps, n_symbols), dtype=np.float32)
+        changes_24h *= 0.3
+        changes_24h -= 0.15
+        
+        # Carry the walk forward for the next call
+        if n_steps:
+            for col, symbol in enumerate(self.symbols):
+                self.current_prices[symbol] = float(prices[-1, col])
+        
+        sym_index = {symbol: col for col, symbol in enumerate(self.symbols)}
+        return timestamps, prices, volumes, changes_24h, sym_index
+
+def market_data_from_arrays(timestamps: np.ndarray, prices: np.ndarray, volumes: np.ndarray,
+                            changes_24h: np.ndarray, sym_index: Dict[str, int]
+                            ) -> Dict[str, List[MarketData]]:
+    """Materialize generated price arrays as MarketData lists per symbol"""
+    bar_times = timestamps.astype('datetime64[us]').tolist()
+    data = {}
+    for symbol, col in sym_index.items():
+        data[symbol] = [
+            MarketData(symbol=symbol, timestamp=timestamp, price=price,
+                       volume=volume, change_24h=change_24h)
+            for timestamp, price, volume, change_24h in zip(
+                bar_times, prices[:, col].tolist(),
+                volumes[:, col].tolist(), changes_24h[:, col].tolist()
+            )
+        ]
+    
+    return data
 
 class Position:
     """Represents a trading position"""
@@ -63,45 +211,32 @@ class Position:
         self.signal = signal
         self.entry_price = entry_price
         self.entry_time = signal.timestamp
+        self.entry_ns = _to_ns(signal.timestamp)
         self.exit_price: Optional[float] = None
         self.exit_time: Optional[datetime] = None
         self.pnl: float = 0.0
         self.is_closed = False
         self.max_favorable_excursion = 0.0  # Best price reached
         self.max_adverse_excursion = 0.0    # Worst price reached
+        
+        # Exit thresholds snapshotted from the signal; unset levels are NaN and never trigger
+        self.side_int = _SIDE_CODES[signal.signal_type]
+        self.side = 1.0 if self.side_int > 0 else -1.0
+        self.stop = signal.stop_loss or np.nan
+        self.tp = signal.take_profit or np.nan
+        self.size = signal.position_size
     
     def update_price(self, current_price: float, current_time: datetime):
         """Update position with current market price"""
         if self.is_closed:
             return
         
-        # Calculate unrealized PnL
-        if self.signal.signal_type == SignalType.BUY:
-            unrealized_pnl = (current_price - self.entry_price) / self.entry_price
-            # Track excursions
-            if current_price > self.entry_price:
-                self.max_favorable_excursion = max(
-                    self.max_favorable_excursion, 
-                    (current_price - self.entry_price) / self.entry_price
-                )
-            else:
-                self.max_adverse_excursion = min(
-                    self.max_adverse_excursion,
-                    (current_price - self.entry_price) / self.entry_price
-                )
-        else:  # SELL
-            unrealized_pnl = (self.entry_price - current_price) / self.entry_price
-            # Track excursions
-            if current_price < self.entry_price:
-                self.max_favorable_excursion = max(
-                    self.max_favorable_excursion,
-                    (self.entry_price - current_price) / self.entry_price
-                )
-            else:
-                self.max_adverse_excursion = min(
-                    self.max_adverse_excursion,
-                    (self.entry_price - current_price) / self.entry_price
-                )
+        # Signed unrealized PnL; excursions are its running max/min
+        unrealized_pnl = self.side * (current_price - self.entry_price) / self.entry_price
+        if unrealized_pnl > self.max_favorable_excursion:
+            self.max_favorable_excursion = unrealized_pnl
+        if unrealized_pnl < self.max_adverse_excursion:
+            self.max_adverse_excursion = unrealized_pnl
         
         # Check exit conditions
         should_exit, exit_reason = self._check_exit_conditions(current_price, current_time)
@@ -111,23 +246,16 @@ class Position:
     def _check_exit_conditions(self, current_price: float, current_time: datetime) -> Tuple[bool, str]:
         """Check if position should be closed"""
         # Time-based exit (max holding period)
-        max_hold_time = timedelta(hours=24)  # 24 hours max
-        if current_time - self.entry_time > max_hold_time:
+        if _to_ns(current_time) - self.entry_ns > MAX_HOLD_NS:
             return True, "time_exit"
         
         # Stop loss
-        if self.signal.stop_loss:
-            if self.signal.signal_type == SignalType.BUY and current_price <= self.signal.stop_loss:
-                return True, "stop_loss"
-            elif self.signal.signal_type == SignalType.SELL and current_price >= self.signal.stop_loss:
-                return True, "stop_loss"
+        if self.side * (current_price - self.stop) <= 0:
+            return True, "stop_loss"
         
         # Take profit
-        if self.signal.take_profit:
-            if self.signal.signal_type == SignalType.BUY and current_price >= self.signal.take_profit:
-                return True, "take_profit"
-            elif self.signal.signal_type == SignalType.SELL and current_price <= self.signal.take_profit:
-                return True, "take_profit"
+        if self.side * (current_price - self.tp) >= 0:
+            return True, "take_profit"
         
         return False, ""
     
@@ -138,40 +266,59 @@ class Position:
         self.is_closed = True
         
         # Calculate final PnL
-        if self.signal.signal_type == SignalType.BUY:
-            self.pnl = (exit_price - self.entry_price) / self.entry_price
-        else:  # SELL
-            self.pnl = (self.entry_price - exit_price) / self.entry_price
+        self.pnl = self.side * (exit_price - self.entry_price) / self.entry_price
         
         # Apply position sizing
-        self.pnl *= self.signal.position_size
+        self.pnl *= self.size
         
         logger.debug(f"Closed {self.symbol} position: {reason}, PnL: {self.pnl:.4f}")
 
 class Portfolio:
     """Portfolio management for backtesting"""
     
-    def __init__(self, initial_capital: float = 100000):
+    def __init__(self, initial_capital: float = 100000, n_steps: int = 0,
+                 symbols: Optional[List[str]] = None):
         self.initial_capital = initial_capital
         self.current_capital = initial_capital
-        self.positions: List[Position] = []
         self.closed_positions: List[Position] = []
-        self.equity_curve = []
         self.daily_returns = []
-        self.max_drawdown = 0.0
-        self.peak_equity = initial_capital
+        
+        # Equity recorded once per update, preallocated for n_steps ticks
+        self.n_ticks = 0
+        self.equity_arr = np.empty(n_steps, dtype=np.float64)
+        self.ts_ns = np.empty(n_steps, dtype=np.int64)
+        
+        # Symbols numbered in the given order, then in order of first appearance
+        self._symbols: List[str] = list(symbols or [])
+        self._symbol_to_idx: Dict[str, int] = {symbol: i for i, symbol in enumerate(self._symbols)}
+        
+        # Position state as parallel arrays for the update kernel. Slots are filled
+        # in opening order and closed by clearing _open; settled slots are compacted
+        # away when the arrays fill up.
+        self._n_slots = 0
+        self._n_open = 0
+        self._slot_positions: List[Optional[Position]] = []
+        self._open_by_symbol: Dict[str, int] = {}  # symbol -> slot of its open position
+        for name, dtype in _POSITION_COLUMNS:
+            setattr(self, name, np.zeros(16, dtype=dtype))
+    
+    @property
+    def positions(self) -> List[Position]:
+        """Open positions in the order they were opened"""
+        return [position for position in self._slot_positions if position is not None]
     
     def add_signal(self, signal: TradingSignal, current_price: float) -> bool:
         """Add a trading signal to the portfolio"""
-        if signal.signal_type == SignalType.HOLD:
+        if _SIDE_CODES[signal.signal_type] == SIDE_HOLD:
             return False
         
         # Check if we already have a position in this asset
-        existing_position = self._get_open_position(signal.asset)
-        if existing_position:
+        slot = self._get_open_slot(signal.asset)
+        if slot is not None:
             # Close existing position first
-            existing_position.close_position(current_price, signal.timestamp, "new_signal")
-            self._settle_closed_position(existing_position)
+            self._open[slot] = False
+            self._slot_positions[slot].close_position(current_price, signal.timestamp, "new_signal")
+            self._settle_closed_position(slot)
         
         # Calculate position size in dollar terms
         position_value = self.current_capital * signal.position_size
@@ -183,72 +330,163 @@ class Portfolio:
         
         # Create new position
         position = Position(signal.asset, signal, current_price)
-        self.positions.append(position)
+        self._append_row(position)
         
         logger.debug(f"Opened {signal.signal_type.value} position in {signal.asset} at {current_price}")
         return True
     
-    def update_positions(self, market_data: Dict[str, MarketData]):
-        """Update all positions with current market data"""
-        for position in self.positions[:]:  # Copy list to allow modification
-            if position.symbol in market_data:
-                data = market_data[position.symbol]
-                position.update_price(data.price, data.timestamp)
-                
-                if position.is_closed:
-                    self._settle_closed_position(position)
-        
-        # Update equity curve
-        current_equity = self._calculate_current_equity(market_data)
-        self.equity_curve.append({
-            'timestamp': datetime.now(),
-            'equity': current_equity,
-            'drawdown': (self.peak_equity - current_equity) / self.peak_equity
-        })
-        
-        # Update peak and drawdown
-        if current_equity > self.peak_equity:
-            self.peak_equity = current_equity
-        else:
-            current_drawdown = (self.peak_equity - current_equity) / self.peak_equity
-            self.max_drawdown = max(self.max_drawdown, current_drawdown)
+    def update_positions(self, prices_row: np.ndarray, current_ns: int):
+        """Update all positions with one tick of prices (in this portfolio's symbol order)"""
+        self.advance(prices_row.reshape(1, -1), current_ns, 0)
+    
+    def quote_row(self, market_data: Dict[str, MarketData]) -> np.ndarray:
+        """Prices from MarketData quotes in this portfolio's symbol order (NaN where missing)"""
+        quotes = [market_data.get(symbol) for symbol in self._symbols]
+        return np.array([data.price if data else np.nan for data in quotes])
+    
+    def advance(self, prices: np.ndarray, start_ns: int, step_ns: int):
+        """Run a block of ticks with no new signals.
+        
+        prices is (ticks, symbols) with columns in this portfolio's symbol order;
+        tick t is at start_ns + t * step_ns.
+        """
+        n_ticks = len(prices)
+        k = self.n_ticks
+        if k + n_ticks > len(self.equity_arr):
+            extra = max(k + n_ticks - len(self.equity_arr), k, 16)
+            self.equity_arr = np.concatenate((self.equity_arr, np.empty(extra)))
+            self.ts_ns = np.concatenate((self.ts_ns, np.empty(extra, dtype=np.int64)))
+        self.ts_ns[k:k + n_ticks] = start_ns + np.arange(n_ticks, dtype=np.int64) * step_ns
+        self.n_ticks = k + n_ticks
+        
+        equity = self.equity_arr[k:k + n_ticks]
+        if not self._n_open:
+            equity[:] = self.current_capital
+            return
+        
+        n = self._n_slots
+        closed_tick = np.empty(self._n_open, dtype=np.int64)
+        closed_slot = np.empty(self._n_open, dtype=np.int64)
+        closed_code = np.empty(self._n_open, dtype=np.int8)
+        closed_return = np.empty(self._n_open, dtype=np.float64)
+        self.current_capital, n_closed = _advance_kernel(
+            prices, start_ns, step_ns, self.current_capital,
+            self._open[:n], self._sym_id[:n], self._entry_px[:n], self._entry_ns[:n],
+            self._side[:n], self._stop[:n], self._tp[:n], self._size[:n],
+            self._mfe[:n], self._mae[:n],
+            equity, closed_tick, closed_slot, closed_code, closed_return
+        )
+        
+        # Capital is already settled; bring the closed Position records up to date
+        for t, i, code, daily_return in zip(
+            closed_tick[:n_closed].tolist(), closed_slot[:n_closed].tolist(),
+            closed_code[:n_closed].tolist(), closed_return[:n_closed].tolist()
+        ):
+            self._slot_positions[i].close_position(
+                float(prices[t, self._sym_id[i]]), _from_ns(start_ns + t * step_ns), EXIT_REASONS[code]
+            )
+            self._release_slot(i, daily_return)
+    
+    @property
+    def drawdowns(self) -> np.ndarray:
+        """Drawdown from the running equity peak at every recorded tick"""
+        equity = self.equity_arr[:self.n_ticks]
+        peaks = np.maximum(np.maximum.accumulate(equity), self.initial_capital) if equity.size else equity
+        return (peaks - equity) / peaks
+    
+    @property
+    def max_drawdown(self) -> float:
+        """Largest drawdown seen over the recorded equity curve"""
+        return float(self.drawdowns.max()) if self.n_ticks else 0.0
+    
+    @property
+    def equity_curve(self) -> List[Dict]:
+        """Recorded equity points as timestamp/equity/drawdown dicts"""
+        return [
+            {'timestamp': timestamp, 'equity': equity, 'drawdown': drawdown}
+            for timestamp, equity, drawdown in zip(
+                self.ts_ns[:self.n_ticks].view('datetime64[ns]').astype('datetime64[us]').tolist(),
+                self.equity_arr[:self.n_ticks].tolist(),
+                self.drawdowns.tolist()
+            )
+        ]
+    
+    def _get_open_slot(self, symbol: str) -> Optional[int]:
+        """Get the slot of the open position for a symbol"""
+        return self._open_by_symbol.get(symbol)
     
     def _get_open_position(self, symbol: str) -> Optional[Position]:
         """Get open position for a symbol"""
-        for position in self.positions:
-            if position.symbol == symbol and not position.is_closed:
-                return position
-        return None
+        slot = self._get_open_slot(symbol)
+        return self._slot_positions[slot] if slot is not None else None
     
-    def _settle_closed_position(self, position: Position):
-        """Settle a closed position"""
+    def _settle_closed_position(self, slot: int):
+        """Settle the closed position in a slot (its _open flag is already cleared)"""
+        position = self._slot_positions[slot]
+        
         # Update capital based on PnL
         pnl_amount = position.pnl * self.current_capital
         self.current_capital += pnl_amount
         
-        # Move to closed positions
-        self.positions.remove(position)
+        self._release_slot(slot, pnl_amount / self.current_capital)
+    
+    def _release_slot(self, slot: int, daily_return: float):
+        """Move a settled position to closed_positions and record its return"""
+        position = self._slot_positions[slot]
+        # Excursions are tracked in the slot columns; copy them onto the record
+        position.max_favorable_excursion = float(self._mfe[slot])
+        position.max_adverse_excursion = float(self._mae[slot])
         self.closed_positions.append(position)
-        
-        # Record daily return
-        daily_return = pnl_amount / self.current_capital
+        self._slot_positions[slot] = None
+        del self._open_by_symbol[position.symbol]
+        self._n_open -= 1
         self.daily_returns.append(daily_return)
     
-    def _calculate_current_equity(self, market_data: Dict[str, MarketData]) -> float:
-        """Calculate current portfolio equity including unrealized PnL"""
-        equity = self.current_capital
-        
-        for position in self.positions:
-            if not position.is_closed and position.symbol in market_data:
-                current_price = market_data[position.symbol].price
-                if position.signal.signal_type == SignalType.BUY:
-                    unrealized_pnl = (current_price - position.entry_price) / position.entry_price
-                else:
-                    unrealized_pnl = (position.entry_price - current_price) / position.entry_price
-                
-                equity += unrealized_pnl * position.signal.position_size * self.current_capital
-        
-        return equity
+    def _append_row(self, position: Position):
+        """Add an opened position's state in the next free slot"""
+        n = self._n_slots
+        if n == len(self._entry_px):
+            if self._n_open <= n // 2:
+                self._compact()
+            else:
+                for name, _ in _POSITION_COLUMNS:
+                    column = getattr(self, name)
+                    setattr(self, name, np.concatenate((column, np.zeros_like(column))))
+            n = self._n_slots
+        
+        sid = self._symbol_to_idx.get(position.symbol)
+        if sid is None:
+            sid = self._symbol_to_idx[position.symbol] = len(self._symbols)
+            self._symbols.append(position.symbol)
+        
+        self._open[n] = True
+        self._sym_id[n] = sid
+        self._entry_px[n] = position.entry_price
+        self._entry_ns[n] = position.entry_ns
+        self._side[n] = position.side_int
+        self._stop[n] = position.stop
+        self._tp[n] = position.tp
+        self._size[n] = position.size
+        self._mfe[n] = 0.0
+        self._mae[n] = 0.0
+        
+        self._slot_positions.append(position)
+        self._open_by_symbol[position.symbol] = n
+        self._n_slots = n + 1
+        self._n_open += 1
+    
+    def _compact(self):
+        """Drop settled slots, keeping open positions in opening order"""
+        keep = np.flatnonzero(self._open[:self._n_slots])
+        k = keep.size
+        for name, _ in _POSITION_COLUMNS:
+            column = getattr(self, name)
+            column[:k] = column[keep]
+            column[k:] = 0
+        
+        self._slot_positions = [self._slot_positions[i] for i in keep.tolist()]
+        self._open_by_symbol = {position.symbol: slot for slot, position in enumerate(self._slot_positions)}
+        self._n_slots = k
 
 class BacktestEngine:
     """Main backtesting engine"""
@@ -264,105 +502,114 @@ class BacktestEngine:
         start_date: datetime, 
         end_date: datetime,
         initial_capital: float = 100000,
-        symbols: List[str] = None
+        symbols: List[str] = None,
+        include_trades: bool = False,
+        seed: Optional[int] = None
     ) -> BacktestResult:
-        """Run a complete backtest"""
+        """Run a complete backtest (set include_trades to get per-trade records in details,
+        seed to make the mock market data reproducible)"""
         
         if not symbols:
-            symbols = list(set(signal.asset for signal in signals))
+            symbols = sorted(set(signal.asset for signal in signals))
         
         # Initialize components
-        self.mock_data_generator = MockMarketData(symbols)
-        self.portfolio = Portfolio(initial_capital)
+        self.mock_data_generator = MockMarketData(symbols, seed)
         
-        # Generate market data
+        # Generate market data on the simulation grid: row t is tick t, column per symbol
         logger.info(f"Generating market data from {start_date} to {end_date}")
-        market_data = self.mock_data_generator.generate_price_data(start_date, end_date)
+        timestamps, prices, _, _, columns = self.mock_data_generator.generate_price_data(
+            start_date, end_date, BAR_MINUTES
+        )
+        self.portfolio = Portfolio(initial_capital, n_steps=len(timestamps), symbols=symbols)
+        
+        # Align each signal to the first bar at or after it, so a signal never trades
+        # on a price from before it was generated; signals outside the range are dropped
+        step_ns = BAR_MINUTES * 60 * 10**9
+        start_ns = _to_ns(start_date)
+        n_steps = len(timestamps)
+        bar_ns = timestamps.view(np.int64)
+        signal_ns = np.fromiter(
+            (_to_ns(signal.timestamp) for signal in signals), dtype=np.int64, count=len(signals)
+        )
+        bar_idx = np.searchsorted(bar_ns, signal_ns)
+        in_range = np.flatnonzero((signal_ns >= start_ns) & (bar_idx < n_steps))
         
-        # Organize signals by timestamp
-        signals_by_time = {}
-        for signal in signals:
-            timestamp = signal.timestamp
-            if timestamp not in signals_by_time:
-                signals_by_time[timestamp] = []
-            signals_by_time[timestamp].append(signal)
+        # Signal events in bar order, keeping input order within a bar
+        order = in_range[np.argsort(bar_idx[in_range], kind='stable')]
+        events: Dict[int, List[TradingSignal]] = {}
+        for i, t_idx in zip(order.tolist(), bar_idx[order].tolist()):
+            events.setdefault(t_idx, []).append(signals[i])
         
-        # Run simulation
+        # Run simulation: the compiled kernel covers every stretch of bars between
+        # signal events, Python only steps in to open and close on signals
         logger.info("Running backtest simulation...")
-        current_date = start_date
-        while current_date <= end_date:
-            # Get current market data
-            current_market_data = {}
-            for symbol in symbols:
-                # Find closest market data point
-                symbol_data = market_data[symbol]
-                closest_data = min(
-                    symbol_data, 
-                    key=lambda x: abs((x.timestamp - current_date).total_seconds())
-                )
-                current_market_data[symbol] = closest_data
-            
-            # Process any signals at this timestamp
-            if current_date in signals_by_time:
-                for signal in signals_by_time[current_date]:
-                    if signal.asset in current_market_data:
-                        current_price = current_market_data[signal.asset].price
-                        self.portfolio.add_signal(signal, current_price)
+        t_start = 0
+        for t_idx, bar_signals in events.items():
+            self.portfolio.advance(prices[t_start:t_idx], start_ns + t_start * step_ns, step_ns)
             
-            # Update portfolio
-            self.portfolio.update_positions(current_market_data)
-            
-            # Move to next timestamp
-            current_date += timedelta(minutes=5)
+            # Process the signals at this bar, then run on from it
+            for signal in bar_signals:
+                col = columns.get(signal.asset)
+                if col is not None:
+                    self.portfolio.add_signal(signal, float(prices[t_idx, col]))
+            t_start = t_idx
+        
+        self.portfolio.advance(prices[t_start:], start_ns + t_start * step_ns, step_ns)
         
         # Calculate final results
-        return self._calculate_results(start_date, end_date)
+        return self._calculate_results(start_date, end_date, include_trades)
     
-    def _calculate_results(self, start_date: datetime, end_date: datetime) -> BacktestResult:
+    def _calculate_results(self, start_date: datetime, end_date: datetime,
+                           include_trades: bool = False) -> BacktestResult:
         """Calculate backtest results and performance metrics"""
         
         # Basic metrics
-        final_equity = self.portfolio.equity_curve[-1]['equity'] if self.portfolio.equity_curve else self.portfolio.initial_capital
+        final_equity = float(self.portfolio.equity_arr[self.portfolio.n_ticks - 1]) if self.portfolio.n_ticks else self.portfolio.initial_capital
         total_return = (final_equity - self.portfolio.initial_capital) / self.portfolio.initial_capital
         
         # Calculate Sharpe ratio
-        if self.portfolio.daily_returns:
-            returns_array = np.array(self.portfolio.daily_returns)
-            sharpe_ratio = np.mean(returns_array) / np.std(returns_array) * np.sqrt(252) if np.std(returns_array) > 0 else 0
-        else:
-            sharpe_ratio = 0
+        returns_array = np.array(self.portfolio.daily_returns, dtype=np.float64)
+        returns_std = float(returns_array.std()) if returns_array.size else 0.0
+        sharpe_ratio = float(returns_array.mean()) / returns_std * np.sqrt(252) if returns_std > 0 else 0
+        
+        # Per-trade PnL and duration (hours) as arrays; every stat below is a mask or reduction
+        closed = self.portfolio.closed_positions
+        pnl = np.array([p.pnl for p in closed], dtype=np.float64)
+        durations = np.array(
+            [(p.exit_time - p.entry_time).total_seconds() for p in closed], dtype=np.float64
+        ) / 3600
+        entry_order = np.argsort(
+            np.array([p.entry_ns for p in closed], dtype=np.int64), kind='stable'
+        )
+        is_win = pnl > 0
+        is_loss = pnl < 0
+        wins = pnl[is_win]
+        losses = pnl[is_loss]
         
         # Win rate and profit factor
-        profitable_trades = [p for p in self.portfolio.closed_positions if p.pnl > 0]
-        losing_trades = [p for p in self.portfolio.closed_positions if p.pnl < 0]
+        total_trades = len(closed)
+        win_rate = wins.size / total_trades if total_trades > 0 else 0
         
-        total_trades = len(self.portfolio.closed_positions)
-        win_rate = len(profitable_trades) / total_trades if total_trades > 0 else 0
-        
-        total_profit = sum(p.pnl for p in profitable_trades)
-        total_loss = abs(sum(p.pnl for p in losing_trades))
+        total_profit = float(wins.sum())
+        total_loss = abs(float(losses.sum()))
         profit_factor = total_profit / total_loss if total_loss > 0 else float('inf')
         
         # Average trade duration
-        if self.portfolio.closed_positions:
-            durations = [(p.exit_time - p.entry_time).total_seconds() / 3600 for p in self.portfolio.closed_positions if p.exit_time]
-            avg_trade_duration = np.mean(durations) if durations else 0
-        else:
-            avg_trade_duration = 0
+        avg_trade_duration = float(durations.mean()) if durations.size else 0
         
         # Detailed analysis
         details = {
             'final_equity': final_equity,
-            'total_profitable_trades': len(profitable_trades),
-            'total_losing_trades': len(losing_trades),
-            'largest_win': max((p.pnl for p in profitable_trades), default=0),
-            'largest_loss': min((p.pnl for p in losing_trades), default=0),
-            'avg_win': np.mean([p.pnl for p in profitable_trades]) if profitable_trades else 0,
-            'avg_loss': np.mean([p.pnl for p in losing_trades]) if losing_trades else 0,
-            'max_consecutive_wins': self._calculate_max_consecutive(profitable_trades),
-            'max_consecutive_losses': self._calculate_max_consecutive(losing_trades),
+            'total_profitable_trades': int(wins.size),
+            'total_losing_trades': int(losses.size),
+            'largest_win': float(wins.max()) if wins.size else 0,
+            'largest_loss': float(losses.min()) if losses.size else 0,
+            'avg_win': float(wins.mean()) if wins.size else 0,
+            'avg_loss': float(losses.mean()) if losses.size else 0,
+            'max_consecutive_wins': self._calculate_max_consecutive(is_win[entry_order]),
+            'max_consecutive_losses': self._calculate_max_consecutive(is_loss[entry_order]),
             'equity_curve': self.portfolio.equity_curve,
-            'all_trades': [asdict(p) for p in self.portfolio.closed_positions]
+            'all_trades': self._trade_records(closed) if include_trades else None
         }
         
         return BacktestResult(
@@ -379,22 +626,28 @@ class BacktestEngine:
             details=details
         )
     
-    def _calculate_max_consecutive(self, trades: List[Position]) -> int:
-        """Calculate maximum consecutive wins or losses"""
-        if not trades:
+    def _trade_records(self, trades: List[Position]) -> np.recarray:
+        """Closed trades as a flat record array (one row per trade, in closing order)"""
+        return np.rec.fromarrays(
+            [
+                np.array([p.entry_ns for p in trades], dtype=np.int64),
+                np.array([_to_ns(p.exit_time) for p in trades], dtype=np.int64),
+                np.array([p.entry_price for p in trades], dtype=np.float64),
+                np.array([p.exit_price for p in trades], dtype=np.float64),
+                np.array([p.pnl for p in trades], dtype=np.float64),
+                np.array([p.side_int for p in trades], dtype=np.int8),
+            ],
+            names='entry_ns,exit_ns,entry_px,exit_px,pnl,side'
+        )
+    
+    def _calculate_max_consecutive(self, mask: np.ndarray) -> int:
+        """Calculate maximum consecutive wins or losses from a per-trade mask in entry order"""
+        if not mask.any():
             return 0
         
-        max_consecutive = 0
-        current_consecutive = 0
-        
-        # Sort trades by time
-        sorted_trades = sorted(trades, key=lambda x: x.entry_time)
-        
-        for trade in sorted_trades:
-            current_consecutive += 1
-            max_consecutive = max(max_consecutive, current_consecutive)
-        
-        return max_consecutive
+        # Run boundaries: +1 where a streak starts, -1 just past where it ends
+        edges = np.flatnonzero(np.diff(np.concatenate(([0], mask.view(np.int8), [0]))))
+        return int((edges[1::2] - edges[::2]).max())
 
 async def run_strategy_backtest(signals: List[TradingSignal]) -> BacktestResult:
     """Run a backtest with the provided signals"""
@@ -3,17 +3,102 @@ Data ingestion module for multiple sources
 """
 import asyncio
 import aiohttp
-import json
+import itertools
 import logging
+import sys
+import time
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, AsyncGenerator
 from abc import ABC, abstractmethod
 
+import numpy as np
+import orjson
+import xxhash
+
+from api_integrations._http_cache import CACHE_TTL, cached_get_json, cached_stream_items
+from api_integrations._rate_limit import TokenBucket
+from api_integrations._session import close_session, get_session
 from config import api_config, data_config
 from core.data_models import RawData, DataSource
 
 logger = logging.getLogger(__name__)
 
+# Random generator for mock data
+_rng = np.random.default_rng()
+
+# Mock items drawn per batch, so random draws are vectorized rather than per item
+MOCK_DRAW_BATCH_SIZE = 1024
+
+# Mock IDs are a process-wide base plus a counter, so no clock read per item;
+# the base is formatted once and both parts are hex to keep IDs short
+_MOCK_ID_BASE = f"{time.monotonic_ns():x}"
+_mock_seq = itertools.count()
+
+# Mock content, interned so every item repeating a line shares one string
+_MOCK_TWEETS = tuple(map(sys.intern, (
+    "Bitcoin is mooning! 🚀 This bull run is just getting started #BTC #crypto",
+    "Major selloff in crypto markets today. Time to buy the dip? 🤔 #Bitcoin #ETH",
+    "BREAKING: Major institution announces Bitcoin allocation 📈 #crypto #news",
+    "Market looking very bearish right now. Time to be cautious 📉 #stocks #trading",
+    "Ethereum hitting new highs! DeFi season is here 🌟 #ETH #DeFi",
+    "FUD spreading everywhere but fundamentals remain strong 💪 #HODL",
+    "This volatility is insane! Markets going crazy today 📊 #trading",
+    "Accumulating more during this dip. Long term bullish 📈 #investing"
+)))
+
+_MOCK_REDDIT_POSTS = tuple(map(sys.intern, (
+    "Just bought more BTC. This dip won't last long! Diamond hands 💎🙌",
+    "Analysis: Why I think we're entering a bear market. Thoughts?",
+    "DCA strategy has been working great for me. Down 20% but still buying",
+    "FOMO is real right now. Should I wait for a better entry point?",
+    "Technical analysis suggests we might see $100k Bitcoin soon",
+    "Panic selling everywhere. This is when you separate weak from strong hands",
+    "Institutional adoption is accelerating. Very bullish long term",
+    "Market manipulation is obvious. Whales dumping to cause fear"
+)))
+
+_MOCK_HEADLINES = tuple(map(sys.intern, (
+    "Bitcoin Surges Past $50K as Institutional Demand Grows",
+    "Federal Reserve Hints at Interest Rate Changes Affecting Crypto Markets",
+    "Major Bank Announces Cryptocurrency Trading Services",
+    "Regulatory Clarity Boosts Market Confidence in Digital Assets",
+    "Tech Stocks Rally on Positive Earnings Reports",
+    "Market Volatility Increases Amid Global Economic Uncertainty",
+    "Ethereum Upgrade Shows Promising Network Improvements",
+    "Investment Firm Predicts Bullish Outlook for Blockchain Technology"
+)))
+
+# Items are handed downstream in batches of up to RAW_BATCH_SIZE, flushed early
+# when a source goes quiet for BATCH_TIMEOUT seconds
+RAW_BATCH_SIZE = 64
+BATCH_TIMEOUT = 1.0
+
+# Items a fetcher may run ahead of its consumer before put() blocks it
+SOURCE_QUEUE_SIZE = 1024
+
+# Content hashes remembered for dropping reposts and re-polled articles
+MAX_SEEN_CONTENT = 100000
+
+# Polling requests fail fast rather than hold the shared pool for the session default
+_REQUEST_TIMEOUT = aiohttp.ClientTimeout(total=10, connect=3)
+
+# Twitter v2 recent search allows 450 requests per 15 minute window
+TWITTER_SEARCH_REQUESTS = 450
+TWITTER_SEARCH_WINDOW = 900
+TWITTER_SEARCH_BURST = 10
+
+# Retry delay after a failed poll starts here and doubles up to MAX_BACKOFF seconds
+INITIAL_BACKOFF = 1.0
+MAX_BACKOFF = 300.0
+
+def _retry_after_seconds(headers) -> float:
+    """Seconds requested by a Retry-After header, 0 when absent or not numeric"""
+    try:
+        return max(float(headers.get('Retry-After', 0)), 0) if headers else 0
+    except ValueError:
+        return 0
+
 class DataIngestionBase(ABC):
     """Base class for data ingestion"""
     
@@ -21,19 +106,43 @@ class DataIngestionBase(ABC):
         self.source = source
         self.is_running = False
         self.session: Optional[aiohttp.ClientSession] = None
+        self._backoff = INITIAL_BACKOFF
+        self._stop_event = asyncio.Event()
+        # Mock feeds cycle through a few fixed texts, so only live feeds set this
+        self.deduplicate = False
+    
+    async def _sleep(self, delay: float):
+        """Sleep between items or polls, waking immediately when stop() is called"""
+        try:
+            await asyncio.wait_for(self._stop_event.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+    
+    def _next_backoff(self, retry_after: float = 0) -> float:
+        """Jittered delay before retrying a failed poll; doubles on each call"""
+        delay = max(retry_after, self._backoff) * _rng.uniform(0.8, 1.2)
+        self._backoff = min(self._backoff * 2, MAX_BACKOFF)
+        return delay
+    
+    def _error_delay(self, error: aiohttp.ClientResponseError, poll_interval: float) -> float:
+        """Delay after an HTTP error: back off on 429/5xx, otherwise wait a normal poll"""
+        if error.status == 429 or error.status >= 500:
+            return self._next_backoff(_retry_after_seconds(error.headers))
+        # Other client errors will not fix themselves on a quick retry
+        return poll_interval
     
     async def start(self):
         """Start the data ingestion"""
-        if not self.session:
-            self.session = aiohttp.ClientSession()
+        self.session = await get_session()
+        self._stop_event.clear()
         self.is_running = True
         logger.info(f"Started {self.source.value} data ingestion")
     
     async def stop(self):
         """Stop the data ingestion"""
         self.is_running = False
-        if self.session:
-            await self.session.close()
+        self._stop_event.set()
+        self.session = None  # shared session is closed by the manager
         logger.info(f"Stopped {self.source.value} data ingestion")
     
     @abstractmethod
@@ -47,6 +156,8 @@ class TwitterIngestion(DataIngestionBase):
     def __init__(self):
         super().__init__(DataSource.TWITTER)
         self.bearer_token = api_config.TWITTER_BEARER_TOKEN
+        self._limiter = TokenBucket(TWITTER_SEARCH_REQUESTS / TWITTER_SEARCH_WINDOW, TWITTER_SEARCH_BURST)
+        self.deduplicate = self.bearer_token != 'demo_token'
     
     async def fetch_data(self) -> AsyncGenerator[RawData, None]:
         """Fetch tweets related to financial keywords"""
@@ -61,65 +172,78 @@ class TwitterIngestion(DataIngestionBase):
     
     async def _generate_mock_tweets(self) -> AsyncGenerator[RawData, None]:
         """Generate mock Twitter data for demonstration"""
-        mock_tweets = [
-            "Bitcoin is mooning! 🚀 This bull run is just getting started #BTC #crypto",
-            "Major selloff in crypto markets today. Time to buy the dip? 🤔 #Bitcoin #ETH",
-            "BREAKING: Major institution announces Bitcoin allocation 📈 #crypto #news",
-            "Market looking very bearish right now. Time to be cautious 📉 #stocks #trading",
-            "Ethereum hitting new highs! DeFi season is here 🌟 #ETH #DeFi",
-            "FUD spreading everywhere but fundamentals remain strong 💪 #HODL",
-            "This volatility is insane! Markets going crazy today 📊 #trading",
-            "Accumulating more during this dip. Long term bullish 📈 #investing"
-        ]
-        
-        import random
+        source = self.source
+        id_prefix = f"tweet_{_MOCK_ID_BASE}_"
+        n = MOCK_DRAW_BATCH_SIZE
         while self.is_running:
-            tweet = random.choice(mock_tweets)
-            data = RawData(
-                id=f"tweet_{datetime.now().timestamp()}",
-                source=self.source,
-                timestamp=datetime.now(),
-                content=tweet,
-                author=f"user_{random.randint(1000, 9999)}",
-                metadata={"retweets": random.randint(0, 100), "likes": random.randint(0, 500)}
+            draws = zip(
+                _rng.integers(0, len(_MOCK_TWEETS), n).tolist(),
+                _rng.integers(1000, 9999, n, endpoint=True).tolist(),
+                _rng.integers(0, 100, n, endpoint=True).tolist(),
+                _rng.integers(0, 500, n, endpoint=True).tolist(),
+                _rng.uniform(2, 8, n).tolist()  # Random delay between tweets
             )
-            yield data
-            await asyncio.sleep(random.uniform(2, 8))  # Random delay between tweets
+            for tweet_idx, author_id, retweets, likes, delay in draws:
+                if not self.is_running:
+                    break
+                
+                yield RawData(
+                    id=f"{id_prefix}{next(_mock_seq):x}",
+                    source=source,
+                    timestamp=datetime.now(),
+                    content=_MOCK_TWEETS[tweet_idx],
+                    author=f"user_{author_id}",
+                    metadata={"retweets": retweets, "likes": likes}
+                )
+                await self._sleep(delay)
     
     async def _fetch_real_tweets(self) -> AsyncGenerator[RawData, None]:
         """Fetch real tweets using Twitter API v2"""
+        source = self.source
         headers = {"Authorization": f"Bearer {self.bearer_token}"}
         keywords = " OR ".join(data_config.TWITTER_KEYWORDS)
         
+        # Twitter API v2 recent search endpoint
+        url = "https://api.twitter.com/2/tweets/search/recent"
+        params = {
+            "query": keywords,
+            "max_results": 10,
+            "tweet.fields": "created_at,author_id,public_metrics"
+        }
+        
         while self.is_running:
+            delay = 0
             try:
-                # Twitter API v2 recent search endpoint
-                url = "https://api.twitter.com/2/tweets/search/recent"
-                params = {
-                    "query": keywords,
-                    "max_results": 10,
-                    "tweet.fields": "created_at,author_id,public_metrics"
-                }
+                # Poll as fast as the quota allows, asking only for tweets newer than the last page
+                await self._limiter.acquire()
+                data = await cached_get_json(self.session, url, params, ttl=CACHE_TTL['tweets_recent'],
+                                             headers=headers, timeout=_REQUEST_TIMEOUT)
+                for tweet in data.get("data", []):
+                    yield RawData(
+                        id=tweet["id"],
+                        source=source,
+                        timestamp=datetime.fromisoformat(tweet["created_at"]),
+                        content=tweet["text"],
+                        author=tweet["author_id"],
+                        metadata=tweet.get("public_metrics", {})
+                    )
                 
-                async with self.session.get(url, headers=headers, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        for tweet in data.get("data", []):
-                            yield RawData(
-                                id=tweet["id"],
-                                source=self.source,
-                                timestamp=datetime.fromisoformat(tweet["created_at"].replace("Z", "+00:00")),
-                                content=tweet["text"],
-                                author=tweet["author_id"],
-                                metadata=tweet.get("public_metrics", {})
-                            )
-                    else:
-                        logger.warning(f"Twitter API error: {response.status}")
-                
-                await asyncio.sleep(60)  # Rate limiting
+                newest_id = data.get("meta", {}).get("newest_id")
+                if newest_id:
+                    params["since_id"] = newest_id
+                self._backoff = INITIAL_BACKOFF
+                self._limiter.restore()
+            except aiohttp.ClientResponseError as e:
+                logger.warning(f"Twitter API error: {e.status}")
+                if e.status == 429:
+                    self._limiter.throttle()
+                delay = self._error_delay(e, 60)
             except Exception as e:
                 logger.error(f"Error fetching Twitter data: {e}")
-                await asyncio.sleep(30)
+                delay = self._next_backoff()
+            
+            if delay:
+                await self._sleep(delay)
 
 class RedditIngestion(DataIngestionBase):
     """Reddit data ingestion"""
@@ -135,30 +259,30 @@ class RedditIngestion(DataIngestionBase):
     
     async def _generate_mock_reddit(self) -> AsyncGenerator[RawData, None]:
         """Generate mock Reddit data"""
-        mock_posts = [
-            "Just bought more BTC. This dip won't last long! Diamond hands 💎🙌",
-            "Analysis: Why I think we're entering a bear market. Thoughts?",
-            "DCA strategy has been working great for me. Down 20% but still buying",
-            "FOMO is real right now. Should I wait for a better entry point?",
-            "Technical analysis suggests we might see $100k Bitcoin soon",
-            "Panic selling everywhere. This is when you separate weak from strong hands",
-            "Institutional adoption is accelerating. Very bullish long term",
-            "Market manipulation is obvious. Whales dumping to cause fear"
-        ]
-        
-        import random
+        source = self.source
+        id_prefix = f"reddit_{_MOCK_ID_BASE}_"
+        n = MOCK_DRAW_BATCH_SIZE
         while self.is_running:
-            post = random.choice(mock_posts)
-            data = RawData(
-                id=f"reddit_{datetime.now().timestamp()}",
-                source=self.source,
-                timestamp=datetime.now(),
-                content=post,
-                author=f"redditor_{random.randint(1000, 9999)}",
-                metadata={"upvotes": random.randint(-10, 100), "comments": random.randint(0, 50)}
+            draws = zip(
+                _rng.integers(0, len(_MOCK_REDDIT_POSTS), n).tolist(),
+                _rng.integers(1000, 9999, n, endpoint=True).tolist(),
+                _rng.integers(-10, 100, n, endpoint=True).tolist(),
+                _rng.integers(0, 50, n, endpoint=True).tolist(),
+                _rng.uniform(3, 10, n).tolist()
             )
-            yield data
-            await asyncio.sleep(random.uniform(3, 10))
+            for post_idx, author_id, upvotes, comments, delay in draws:
+                if not self.is_running:
+                    break
+                
+                yield RawData(
+                    id=f"{id_prefix}{next(_mock_seq):x}",
+                    source=source,
+                    timestamp=datetime.now(),
+                    content=_MOCK_REDDIT_POSTS[post_idx],
+                    author=f"redditor_{author_id}",
+                    metadata={"upvotes": upvotes, "comments": comments}
+                )
+                await self._sleep(delay)
 
 class NewsIngestion(DataIngestionBase):
     """News data ingestion"""
@@ -166,6 +290,7 @@ class NewsIngestion(DataIngestionBase):
     def __init__(self):
         super().__init__(DataSource.NEWS)
         self.api_key = api_config.NEWS_API_KEY
+        self.deduplicate = self.api_key != 'demo_key'
     
     async def fetch_data(self) -> AsyncGenerator[RawData, None]:
         """Fetch financial news articles"""
@@ -178,57 +303,64 @@ class NewsIngestion(DataIngestionBase):
     
     async def _generate_mock_news(self) -> AsyncGenerator[RawData, None]:
         """Generate mock news data"""
-        mock_headlines = [
-            "Bitcoin Surges Past $50K as Institutional Demand Grows",
-            "Federal Reserve Hints at Interest Rate Changes Affecting Crypto Markets",
-            "Major Bank Announces Cryptocurrency Trading Services",
-            "Regulatory Clarity Boosts Market Confidence in Digital Assets",
-            "Tech Stocks Rally on Positive Earnings Reports",
-            "Market Volatility Increases Amid Global Economic Uncertainty",
-            "Ethereum Upgrade Shows Promising Network Improvements",
-            "Investment Firm Predicts Bullish Outlook for Blockchain Technology"
-        ]
-        
-        import random
+        source = self.source
+        id_prefix = f"news_{_MOCK_ID_BASE}_"
+        n = MOCK_DRAW_BATCH_SIZE
         while self.is_running:
-            headline = random.choice(mock_headlines)
-            data = RawData(
-                id=f"news_{datetime.now().timestamp()}",
-                source=self.source,
-                timestamp=datetime.now(),
-                content=headline,
-                author="Financial Times",
-                metadata={"category": "finance", "source": "demo_news"}
+            draws = zip(
+                _rng.integers(0, len(_MOCK_HEADLINES), n).tolist(),
+                _rng.uniform(30, 120, n).tolist()  # News comes less frequently
             )
-            yield data
-            await asyncio.sleep(random.uniform(30, 120))  # News comes less frequently
+            for headline_idx, delay in draws:
+                if not self.is_running:
+                    break
+                
+                yield RawData(
+                    id=f"{id_prefix}{next(_mock_seq):x}",
+                    source=source,
+                    timestamp=datetime.now(),
+                    content=_MOCK_HEADLINES[headline_idx],
+                    author="Financial Times",
+                    metadata={"category": "finance", "source": "demo_news"}
+                )
+                await self._sleep(delay)
     
     async def _fetch_real_news(self) -> AsyncGenerator[RawData, None]:
         """Fetch real news using NewsAPI"""
+        source = self.source
         while self.is_running:
             try:
-                keywords = "bitcoin OR cryptocurrency OR blockchain OR stocks OR trading"
-                url = f"https://newsapi.org/v2/everything?q={keywords}&apiKey={self.api_key}&language=en&sortBy=publishedAt"
+                url = "https://newsapi.org/v2/everything"
+                params = {
+                    "q": "bitcoin OR cryptocurrency OR blockchain OR stocks OR trading",
+                    "apiKey": self.api_key,
+                    "language": "en",
+                    "sortBy": "publishedAt"
+                }
                 
-                async with self.session.get(url) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        for article in data.get("articles", []):
-                            yield RawData(
-                                id=article["url"],
-                                source=self.source,
-                                timestamp=datetime.fromisoformat(article["publishedAt"].replace("Z", "+00:00")),
-                                content=f"{article['title']} {article.get('description', '')}",
-                                author=article.get("author", "Unknown"),
-                                metadata={"source": article["source"]["name"], "url": article["url"]}
-                            )
-                    else:
-                        logger.warning(f"News API error: {response.status}")
+                # A page of articles is large; yield each one as it is parsed off the wire
+                articles = cached_stream_items(self.session, url, 'articles.item', params,
+                                               ttl=CACHE_TTL['news_poll'], timeout=_REQUEST_TIMEOUT)
+                async for article in articles:
+                    yield RawData(
+                        id=article["url"],
+                        source=source,
+                        timestamp=datetime.fromisoformat(article["publishedAt"]),
+                        content=f"{article['title']} {article.get('description', '')}",
+                        author=article.get("author", "Unknown"),
+                        metadata={"source": article["source"]["name"], "url": article["url"]}
+                    )
                 
-                await asyncio.sleep(300)  # Check for news every 5 minutes
+                self._backoff = INITIAL_BACKOFF
+                delay = 300  # Check for news every 5 minutes
+            except aiohttp.ClientResponseError as e:
+                logger.warning(f"News API error: {e.status}")
+                delay = self._error_delay(e, 300)
             except Exception as e:
                 logger.error(f"Error fetching news data: {e}")
-                await asyncio.sleep(60)
+                delay = self._next_backoff()
+            
+            await self._sleep(delay)
 
 class FinancialDataIngestion(DataIngestionBase):
     """Financial market data ingestion"""
@@ -243,73 +375,161 @@ class FinancialDataIngestion(DataIngestionBase):
     
     async def _generate_mock_financial(self) -> AsyncGenerator[RawData, None]:
         """Generate mock financial data"""
-        import random
+        source = self.source
         symbols = data_config.CRYPTO_SYMBOLS + data_config.STOCK_SYMBOLS
         
+        n = MOCK_DRAW_BATCH_SIZE
         while self.is_running:
-            symbol = random.choice(symbols)
-            price = random.uniform(100, 50000)
-            change = random.uniform(-0.15, 0.15)
-            volume = random.uniform(1000000, 100000000)
-            
-            financial_data = {
-                "symbol": symbol,
-                "price": price,
-                "change_24h": change,
-                "volume": volume,
-                "timestamp": datetime.now().isoformat()
-            }
-            
-            data = RawData(
-                id=f"market_{symbol}_{datetime.now().timestamp()}",
-                source=self.source,
-                timestamp=datetime.now(),
-                content=json.dumps(financial_data),
-                metadata={"symbol": symbol, "data_type": "market_data"}
+            batch_symbols = [symbols[i] for i in _rng.integers(0, len(symbols), n).tolist()]
+            ticks = zip(
+                batch_symbols,
+                _rng.uniform(100, 50000, n).tolist(),
+                _rng.uniform(-0.15, 0.15, n).tolist(),
+                _rng.uniform(1000000, 100000000, n).tolist()
             )
-            yield data
-            await asyncio.sleep(random.uniform(5, 15))
+            # Serialize the whole batch up front as open JSON objects; only the
+            # emission timestamp is appended per tick
+            bodies = [
+                orjson.dumps({"symbol": symbol, "price": price, "change_24h": change, "volume": volume})[:-1].decode()
+                for symbol, price, change, volume in ticks
+            ]
+            delays = _rng.uniform(5, 15, n).tolist()
+            
+            for symbol, body, delay in zip(batch_symbols, bodies, delays):
+                if not self.is_running:
+                    break
+                
+                now = datetime.now()
+                yield RawData(
+                    id=f"market_{symbol}_{_MOCK_ID_BASE}_{next(_mock_seq):x}",
+                    source=source,
+                    timestamp=now,
+                    content=f'{body},"timestamp":"{now.isoformat()}"}}',
+                    author=None,
+                    metadata={"symbol": symbol, "data_type": "market_data"}
+                )
+                await self._sleep(delay)
 
 class DataIngestionManager:
     """Manages multiple data ingestion sources"""
     
-    def __init__(self):
+    def __init__(self, batch_size: int = RAW_BATCH_SIZE, batch_timeout: float = BATCH_TIMEOUT):
         self.sources = {
             DataSource.TWITTER: TwitterIngestion(),
             DataSource.REDDIT: RedditIngestion(),
             DataSource.NEWS: NewsIngestion(),
             DataSource.FINANCIAL: FinancialDataIngestion()
         }
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
         self.is_running = False
-        self.tasks = []
+        self._stop_event = asyncio.Event()
+        self._group_done: Optional[asyncio.Event] = None
+        self._seen_content: "OrderedDict[int, None]" = OrderedDict()
     
     async def start_all(self):
-        """Start all data ingestion sources"""
+        """Start all data ingestion sources and process them until stop_all"""
         self.is_running = True
+        self._stop_event.clear()
         for source in self.sources.values():
             await source.start()
-            task = asyncio.create_task(self._process_source_data(source))
-            self.tasks.append(task)
         logger.info("All data ingestion sources started")
+        await self.run_forever()
+    
+    async def run_forever(self):
+        """Process every source in one task group until stop_all is called"""
+        self._group_done = asyncio.Event()
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tasks = []
+                for source in self.sources.values():
+                    queue: asyncio.Queue = asyncio.Queue(maxsize=SOURCE_QUEUE_SIZE)
+                    tasks.append(tg.create_task(self._fetch_source_data(source, queue)))
+                    tasks.append(tg.create_task(self._process_source_data(source, queue)))
+                await self._stop_event.wait()
+                for task in tasks:
+                    task.cancel()
+        finally:
+            self._group_done.set()
     
     async def stop_all(self):
         """Stop all data ingestion sources"""
         self.is_running = False
-        for task in self.tasks:
-            task.cancel()
+        self._stop_event.set()
+        if self._group_done is not None:
+            # Wait for the processing tasks to unwind before closing their sources
+            await self._group_done.wait()
         for source in self.sources.values():
             await source.stop()
+        await close_session()
         logger.info("All data ingestion sources stopped")
     
-    async def _process_source_data(self, source: DataIngestionBase):
-        """Process data from a specific source"""
+    async def _fetch_source_data(self, source: DataIngestionBase, queue: asyncio.Queue):
+        """Feed a source's items into its queue; a full queue holds the fetcher back"""
+        deduplicate = source.deduplicate
         try:
             async for data in source.fetch_data():
-                if not self.is_running:
+                if deduplicate and self._is_repeat(data.content):
+                    continue
+                await queue.put(data)
+            await queue.put(None)  # end of stream
+        except Exception as e:
+            logger.error(f"Error fetching data from {source.source.value}: {e}")
+    
+    def _is_repeat(self, content: str) -> bool:
+        """Whether this content was already seen recently (retweets, re-polled articles)"""
+        content_hash = xxhash.xxh3_64_intdigest(content.encode())
+        seen = self._seen_content
+        if content_hash in seen:
+            seen.move_to_end(content_hash)
+            return True
+        
+        seen[content_hash] = None
+        if len(seen) > MAX_SEEN_CONTENT:
+            seen.popitem(last=False)
+        return False
+    
+    async def _process_source_data(self, source: DataIngestionBase, queue: asyncio.Queue):
+        """Process data from a specific source in batches"""
+        pending: List[RawData] = []
+        try:
+            while self.is_running:
+                try:
+                    data = await asyncio.wait_for(queue.get(), timeout=self.batch_timeout)
+                except asyncio.TimeoutError:
+                    if pending:
+                        self._submit_batch(source, pending)
+                        pending = []
+                    continue
+                if data is None:
                     break
-                # Here we would normally send data to sentiment analysis pipeline
-                logger.debug(f"Received data from {source.source.value}: {data.content[:100]}...")
+                
+                pending.append(data)
+                # Take whatever else is already buffered without waiting
+                while len(pending) < self.batch_size and not queue.empty():
+                    data = queue.get_nowait()
+                    if data is None:
+                        return
+                    pending.append(data)
+                if len(pending) >= self.batch_size:
+                    self._submit_batch(source, pending)
+                    pending = []
         except asyncio.CancelledError:
             logger.info(f"Data processing cancelled for {source.source.value}")
+            raise
         except Exception as e:
-            logger.error(f"Error processing data from {source.source.value}: {e}")
\ No newline at end of file
+            logger.error(f"Error processing data from {source.source.value}: {e}")
+        finally:
+            # Items fetched before shutdown are still handed on
+            while not queue.empty():
+                data = queue.get_nowait()
+                if data is not None:
+                    pending.append(data)
+            if pending:
+                self._submit_batch(source, pending)
+    
+    def _submit_batch(self, source: DataIngestionBase, records: List[RawData]):
+        """Hand a batch of records downstream"""
+        # Here we would normally send the batch to the sentiment analysis pipeline
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Received %d items from %s: %.100s...", len(records), source.source.value, records[0].content)
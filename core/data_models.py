@@ -3,9 +3,11 @@ Core data models for the sentiment engine
 """
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from enum import Enum
 
+import numpy as np
+
 class SentimentPolarity(Enum):
     VERY_NEGATIVE = -2
     NEGATIVE = -1
@@ -24,7 +26,11 @@ class DataSource(Enum):
     NEWS = "NEWS"
     FINANCIAL = "FINANCIAL"
 
-@dataclass
+def epoch_ns(ts: datetime) -> int:
+    """Epoch nanoseconds for a datetime (naive values are local time), to the microsecond"""
+    return round(ts.timestamp() * 1_000_000) * 1000
+
+@dataclass(slots=True)
 class RawData:
     """Raw data from various sources"""
     id: str
@@ -33,17 +39,28 @@ class RawData:
     content: str
     author: Optional[str] = None
     metadata: Dict[str, Any] = field(default_factory=dict)
+    
+    @property
+    def timestamp_ns(self) -> int:
+        """Timestamp as int64 epoch nanoseconds, for numeric windowing"""
+        return epoch_ns(self.timestamp)
+
+# Fixed layout of SentimentScore.emotions
+EMOTION_INDEX = {"fear": 0, "greed": 1, "uncertainty": 2, "confidence": 3}
+
+def _empty_emotions() -> np.ndarray:
+    return np.zeros(len(EMOTION_INDEX), dtype=np.float32)
 
-@dataclass
+@dataclass(slots=True)
 class SentimentScore:
     """Sentiment analysis result"""
     polarity: SentimentPolarity
     confidence: float
     score: float  # -1.0 to 1.0
-    emotions: Dict[str, float] = field(default_factory=dict)
-    entities: List[str] = field(default_factory=list)
+    emotions: np.ndarray = field(default_factory=_empty_emotions)  # float32, see EMOTION_INDEX
+    entities: Tuple[str, ...] = ()
 
-@dataclass
+@dataclass(slots=True)
 class ProcessedData:
     """Processed data with sentiment analysis"""
     raw_data: RawData
@@ -52,7 +69,7 @@ class ProcessedData:
     relevance_score: float = 0.0
     language: str = "en"
 
-@dataclass
+@dataclass(slots=True)
 class AggregatedSentiment:
     """Aggregated sentiment for a specific asset/timeframe"""
     asset: str
@@ -65,7 +82,7 @@ class AggregatedSentiment:
     momentum: float
     sources_breakdown: Dict[DataSource, Dict[str, float]]
 
-@dataclass
+@dataclass(slots=True)
 class MarketData:
     """Market data for correlation analysis"""
     symbol: str
@@ -76,7 +93,7 @@ class MarketData:
     market_cap: Optional[float] = None
     additional_metrics: Dict[str, float] = field(default_factory=dict)
 
-@dataclass
+@dataclass(slots=True)
 class FearGreedIndex:
     """Fear & Greed Index calculation"""
     timestamp: datetime
@@ -87,7 +104,7 @@ class FearGreedIndex:
     correlation_component: float
     classification: str  # "Extreme Fear", "Fear", "Neutral", "Greed", "Extreme Greed"
 
-@dataclass
+@dataclass(slots=True)
 class TradingSignal:
     """Trading signal with confidence and risk metrics"""
     asset: str
@@ -103,7 +120,7 @@ class TradingSignal:
     reasoning: str = ""
     supporting_data: Dict[str, Any] = field(default_factory=dict)
 
-@dataclass
+@dataclass(slots=True)
 class CorrelationAnalysis:
     """Correlation analysis between sentiment and price movements"""
     asset: str
@@ -114,7 +131,7 @@ class CorrelationAnalysis:
     statistical_significance: float
     sample_size: int
 
-@dataclass
+@dataclass(slots=True)
 class BacktestResult:
     """Backtesting performance result"""
     strategy_name: str
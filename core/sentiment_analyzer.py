@@ -4,20 +4,44 @@ Advanced sentiment analysis engine with financial context
 import asyncio
 import logging
 import re
+import threading
+from collections import OrderedDict
 from datetime import datetime
+from pathlib import Path
 from typing import List, Dict, Optional, Tuple
 import numpy as np
+import xxhash
 
 # NLP libraries
 import nltk
+import torch
 from textblob import TextBlob
 from transformers import pipeline, AutoTokenizer, AutoModelForSequenceClassification
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+except ImportError:
+    ORTModelForSequenceClassification = None
+
 from config import processing_config
-from core.data_models import RawData, ProcessedData, SentimentScore, SentimentPolarity
+from core.data_models import RawData, ProcessedData, SentimentScore, SentimentPolarity, EMOTION_INDEX
 
 logger = logging.getLogger(__name__)
 
+# Text preprocessing patterns, compiled once: URLs, mentions and hashtag marks
+# are stripped in a single substitution
+_STRIP_RE = re.compile(r'http\S+|www\S+|https\S+|@\w+|#')
+_WS_RE = re.compile(r'\s+')
+
+# File written by ORTQuantizer into QUANTIZED_MODEL_DIR
+_QUANTIZED_FILE = "model_quantized.onnx"
+
 class FinancialEntityExtractor:
     """Extract financial entities from text"""
     
@@ -39,28 +63,62 @@ class FinancialEntityExtractor:
             'hodl', 'fomo', 'fud', 'diamond hands', 'paper hands', 'moon', 'dip',
             'support', 'resistance', 'breakout', 'breakdown', 'volume', 'market cap'
         ]
+        
+        # Financial-context indicators that raise or lower the sentiment boost
+        self.positive_indicators = ['moon', 'bullish', 'pump', 'breakout', 'rally', 'surge', 'bull run']
+        self.negative_indicators = ['dump', 'bearish', 'crash', 'selloff', 'bear market', 'fud']
+        
+        self._financial_term_set = frozenset(self.financial_terms)
+        self._positive_set = frozenset(self.positive_indicators)
+        self._negative_set = frozenset(self.negative_indicators)
+        self._keywords = self._financial_term_set | self._positive_set | self._negative_set
+        self._keyword_automaton = self._build_keyword_automaton()
+        
+        # Patterns are kept separate (not one alternation) because their matches
+        # overlap, e.g. "$BTC" yields both "$btc" and "btc"
+        self._crypto_res = [re.compile(p, re.IGNORECASE) for p in self.crypto_patterns]
+        self._stock_res = [re.compile(p) for p in self.stock_patterns]
+    
+    def _build_keyword_automaton(self):
+        """Aho-Corasick automaton over all keywords, or None without pyahocorasick"""
+        if ahocorasick is None:
+            return None
+        
+        automaton = ahocorasick.Automaton()
+        for keyword in self._keywords:
+            automaton.add_word(keyword, keyword)
+        automaton.make_automaton()
+        return automaton
+    
+    def find_keywords(self, text_lower: str) -> frozenset:
+        """Financial terms and indicators occurring in lowercased text, in one pass"""
+        if self._keyword_automaton is None:
+            return frozenset(k for k in self._keywords if k in text_lower)
+        return frozenset(k for _, k in self._keyword_automaton.iter(text_lower))
     
     def extract_entities(self, text: str) -> List[str]:
         """Extract financial entities from text"""
+        return self.extract(text, text.lower())[0]
+    
+    def extract(self, text: str, text_lower: str) -> Tuple[List[str], float]:
+        """Extract entities and the net indicator boost from one keyword scan"""
         entities = []
-        text_lower = text.lower()
         
         # Extract crypto entities
-        for pattern in self.crypto_patterns:
-            matches = re.findall(pattern, text_lower, re.IGNORECASE)
-            entities.extend(matches)
+        for pattern in self._crypto_res:
+            entities.extend(pattern.findall(text_lower))
         
         # Extract stock entities
-        for pattern in self.stock_patterns:
-            matches = re.findall(pattern, text.upper())
-            entities.extend(matches)
+        text_upper = text.upper()
+        for pattern in self._stock_res:
+            entities.extend(pattern.findall(text_upper))
         
-        # Extract financial terms
-        for term in self.financial_terms:
-            if term in text_lower:
-                entities.append(term)
+        # Extract financial terms and indicators
+        keywords = self.find_keywords(text_lower)
+        entities.extend(keywords & self._financial_term_set)
+        boost = 0.1 * (len(keywords & self._positive_set) - len(keywords & self._negative_set))
         
-        return list(set(entities))  # Remove duplicates
+        return list(set(entities)), boost  # Remove duplicates
 
 class AdvancedSentimentAnalyzer:
     """Advanced sentiment analysis with financial context"""
@@ -71,22 +129,26 @@ class AdvancedSentimentAnalyzer:
         self.financial_model = None
         self.general_model = None
         self.tokenizer = None
-        
-        # Initialize models asynchronously
-        asyncio.create_task(self._initialize_models())
+        self._init_task: Optional[asyncio.Task] = None
+        self._score_cache: "OrderedDict[int, SentimentScore]" = OrderedDict()
+        # Batches run on executor threads while analyze_sentiment runs on the loop
+        self._cache_lock = threading.Lock()
+    
+    async def ready(self):
+        """Load the models once; await before analyzing so nothing falls back to TextBlob early"""
+        if self._init_task is None:
+            self._init_task = asyncio.create_task(self._initialize_models())
+        await asyncio.shield(self._init_task)
     
     async def _initialize_models(self):
         """Initialize ML models"""
         try:
             logger.info("Initializing sentiment analysis models...")
             
-            # Initialize financial sentiment model (FinBERT)
+            # Initialize financial sentiment model (FinBERT); loading blocks for
+            # seconds, so it runs off the event loop
             try:
-                self.financial_model = pipeline(
-                    "sentiment-analysis",
-                    model="ProsusAI/finbert",
-                    tokenizer="ProsusAI/finbert"
-                )
+                self.financial_model = await asyncio.to_thread(self._load_financial_model)
                 logger.info("FinBERT model loaded successfully")
             except Exception as e:
                 logger.warning(f"Could not load FinBERT model: {e}")
@@ -94,7 +156,7 @@ class AdvancedSentimentAnalyzer:
                 self.financial_model = None
             
             # Initialize general sentiment model
-            self.general_model = pipeline("sentiment-analysis")
+            self.general_model = await asyncio.to_thread(self._load_general_model)
             
             self.models_initialized = True
             logger.info("Sentiment analysis models initialized")
@@ -104,22 +166,67 @@ class AdvancedSentimentAnalyzer:
             # Fallback to TextBlob only
             self.models_initialized = False
     
-    def _preprocess_text(self, text: str) -> str:
-        """Preprocess text for sentiment analysis"""
-        # Remove URLs
-        text = re.sub(r'http\S+|www\S+|https\S+', '', text, flags=re.MULTILINE)
+    @staticmethod
+    def _gpu_dtype():
+        """Half-precision dtype for the first CUDA device: BF16 where supported, else FP16"""
+        return torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+    
+    def _load_general_model(self):
+        """Load the general sentiment pipeline, in half precision on GPU"""
+        if torch.cuda.is_available():
+            return pipeline("sentiment-analysis", device=0, model_kwargs={"torch_dtype": self._gpu_dtype()})
+        return pipeline("sentiment-analysis")
+    
+    def _load_financial_model(self):
+        """Load FinBERT: half precision on GPU, int8 ONNX on CPU-only hosts when available"""
+        model_name = processing_config.FINANCIAL_MODEL
+        if torch.cuda.is_available():
+            model = AutoModelForSequenceClassification.from_pretrained(model_name, torch_dtype=self._gpu_dtype())
+            return pipeline("sentiment-analysis", model=model, tokenizer=model_name, device=0)
+        
+        if ORTModelForSequenceClassification is not None:
+            try:
+                return self._load_quantized_model(model_name)
+            except Exception as e:
+                logger.warning(f"Could not load quantized FinBERT, using FP32: {e}")
+        
+        return pipeline("sentiment-analysis", model=model_name, tokenizer=model_name)
+    
+    def _load_quantized_model(self, model_name: str):
+        """Export and quantize the model to ONNX once, then serve it from ONNX Runtime"""
+        quantized_dir = Path(processing_config.QUANTIZED_MODEL_DIR)
+        if not (quantized_dir / _QUANTIZED_FILE).exists():
+            onnx_model = ORTModelForSequenceClassification.from_pretrained(model_name, export=True)
+            ORTQuantizer.from_pretrained(onnx_model).quantize(
+                save_dir=quantized_dir,
+                quantization_config=AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+            )
         
-        # Remove mentions and hashtags for cleaner analysis (but keep the content)
-        text = re.sub(r'@\w+|#', '', text)
+        model = ORTModelForSequenceClassification.from_pretrained(
+            quantized_dir, file_name=_QUANTIZED_FILE, provider="CPUExecutionProvider"
+        )
+        return pipeline("sentiment-analysis", model=model, tokenizer=AutoTokenizer.from_pretrained(model_name))
+    
+    def _preprocess_and_extract(self, text: str) -> Tuple[str, List[str], float]:
+        """Clean text and derive its entities and financial context boost together"""
+        # Remove URLs, mentions and hashtag marks (but keep the hashtag content)
+        text = _STRIP_RE.sub('', text)
         
         # Normalize whitespace
-        text = re.sub(r'\s+', ' ', text).strip()
+        text = _WS_RE.sub(' ', text).strip()
         
         # Limit length
         if len(text) > processing_config.MAX_TEXT_LENGTH:
             text = text[:processing_config.MAX_TEXT_LENGTH]
         
-        return text
+        entities, keyword_boost = self.entity_extractor.extract(text, text.lower())
+        boost = 1.0 + keyword_boost
+        
+        # Entity relevance boost
+        if entities:
+            boost += len(entities) * 0.05
+        
+        return text, entities, max(0.1, min(2.0, boost))  # Clamp boost between 0.1 and 2.0
     
     def _textblob_sentiment(self, text: str) -> Tuple[float, float]:
         """Get sentiment using TextBlob as fallback"""
@@ -129,53 +236,46 @@ class AdvancedSentimentAnalyzer:
         confidence = abs(polarity) * (1 - subjectivity)  # More objective = more confident
         return polarity, min(confidence, 1.0)
     
-    def _transformer_sentiment(self, text: str, model) -> Tuple[float, float]:
-        """Get sentiment using transformer model"""
-        if not model:
-            return self._textblob_sentiment(text)
-        
+    def _transformer_sentiment_batch(self, texts: List[str], model) -> List[Tuple[float, float]]:
+        """Get sentiment for a list of texts with one batched pipeline call"""
         try:
-            result = model(text)[0]
-            label = result['label'].lower()
-            score = result['score']
-            
-            # Convert to polarity scale (-1 to 1)
-            if 'positive' in label or 'bullish' in label:
-                polarity = score
-            elif 'negative' in label or 'bearish' in label:
-                polarity = -score
-            else:  # neutral
-                polarity = 0
-            
-            confidence = score
-            return polarity, confidence
+            # The pipeline batches consecutive inputs, so feeding them shortest first
+            # keeps each batch padded to a similar length
+            order = self._length_order(texts, model)
+            results = model([texts[i] for i in order], batch_size=processing_config.BATCH_SIZE, truncation=True)
             
+            scores: List[Tuple[float, float]] = [None] * len(texts)
+            for i, result in zip(order, results):
+                scores[i] = self._label_polarity(result)
+            return scores
         except Exception as e:
             logger.warning(f"Transformer model error: {e}, falling back to TextBlob")
-            return self._textblob_sentiment(text)
+            return [self._textblob_sentiment(text) for text in texts]
     
-    def _calculate_financial_boost(self, text: str, entities: List[str]) -> float:
-        """Calculate sentiment boost based on financial context"""
-        boost = 1.0
-        text_lower = text.lower()
-        
-        # Positive financial indicators
-        positive_indicators = ['moon', 'bullish', 'pump', 'breakout', 'rally', 'surge', 'bull run']
-        negative_indicators = ['dump', 'bearish', 'crash', 'selloff', 'bear market', 'fud']
-        
-        for indicator in positive_indicators:
-            if indicator in text_lower:
-                boost += 0.1
-        
-        for indicator in negative_indicators:
-            if indicator in text_lower:
-                boost -= 0.1
+    def _length_order(self, texts: List[str], model) -> List[int]:
+        """Indices of texts sorted by token count (character count without a tokenizer)"""
+        tokenizer = getattr(model, 'tokenizer', None)
+        if tokenizer is not None:
+            lengths = tokenizer(texts, truncation=True, return_length=True)['length']
+        else:
+            lengths = [len(text) for text in texts]
+        return np.argsort(lengths, kind='stable').tolist()
+    
+    def _label_polarity(self, result: Dict) -> Tuple[float, float]:
+        """Convert a pipeline label/score result to (polarity, confidence)"""
+        label = result['label'].lower()
+        score = result['score']
         
-        # Entity relevance boost
-        if entities:
-            boost += len(entities) * 0.05
+        # Convert to polarity scale (-1 to 1)
+        if 'positive' in label or 'bullish' in label:
+            polarity = score
+        elif 'negative' in label or 'bearish' in label:
+            polarity = -score
+        else:  # neutral
+            polarity = 0
         
-        return max(0.1, min(2.0, boost))  # Clamp between 0.1 and 2.0
+        confidence = score
+        return polarity, confidence
     
     def _classify_polarity(self, score: float) -> SentimentPolarity:
         """Classify sentiment score into polarity enum"""
@@ -192,43 +292,92 @@ class AdvancedSentimentAnalyzer:
     
     async def analyze_sentiment(self, text: str) -> SentimentScore:
         """Analyze sentiment of text with financial context"""
-        # Preprocess text
-        processed_text = self._preprocess_text(text)
-        
-        # Extract financial entities
-        entities = self.entity_extractor.extract_entities(processed_text)
-        
-        # Get sentiment scores
-        if self.models_initialized and self.financial_model and entities:
-            # Use financial model for finance-related content
-            polarity, confidence = self._transformer_sentiment(processed_text, self.financial_model)
-        elif self.models_initialized and self.general_model:
-            # Use general model
-            polarity, confidence = self._transformer_sentiment(processed_text, self.general_model)
-        else:
-            # Fallback to TextBlob
-            polarity, confidence = self._textblob_sentiment(processed_text)
-        
-        # Apply financial context boost
-        financial_boost = self._calculate_financial_boost(processed_text, entities)
-        adjusted_polarity = polarity * financial_boost
-        adjusted_polarity = max(-1.0, min(1.0, adjusted_polarity))  # Clamp to [-1, 1]
-        
-        # Calculate emotions (simplified)
-        emotions = {
-            "fear": max(0, -adjusted_polarity) if adjusted_polarity < 0 else 0,
-            "greed": max(0, adjusted_polarity) if adjusted_polarity > 0 else 0,
-            "uncertainty": 1 - confidence,
-            "confidence": confidence
-        }
-        
-        return SentimentScore(
-            polarity=self._classify_polarity(adjusted_polarity),
-            confidence=confidence,
-            score=adjusted_polarity,
-            emotions=emotions,
-            entities=entities
-        )
+        return self.analyze_sentiment_batch([text])[0]
+    
+    def analyze_sentiment_batch(self, texts: List[str]) -> List[SentimentScore]:
+        """Analyze a batch of texts, reusing cached results for content seen before"""
+        cache = self._score_cache
+        keys = [xxhash.xxh3_64_intdigest(text.encode()) for text in texts]
+        
+        # Look up every text first; repeats within the batch are analyzed once
+        results: Dict[int, SentimentScore] = {}
+        misses: Dict[int, str] = {}
+        with self._cache_lock:
+            for key, text in zip(keys, texts):
+                if key in cache:
+                    cache.move_to_end(key)
+                    results[key] = cache[key]
+                elif key not in misses:
+                    misses[key] = text
+        
+        # Analysis runs outside the lock; a concurrent miss on the same text just recomputes it
+        if misses:
+            fresh = self._analyze_uncached(list(misses.values()))
+            with self._cache_lock:
+                for key, sentiment in zip(misses, fresh):
+                    results[key] = cache[key] = sentiment
+                while len(cache) > processing_config.SENTIMENT_CACHE_SIZE:
+                    cache.popitem(last=False)
+        
+        return [results[key] for key in keys]
+    
+    def _analyze_uncached(self, texts: List[str]) -> List[SentimentScore]:
+        """Analyze a batch of texts, running each transformer once over its share of the batch"""
+        # Preprocess text, extract financial entities and context boosts
+        processed_texts, entities, boosts = [], [], []
+        for text in texts:
+            processed_text, text_entities, boost = self._preprocess_and_extract(text)
+            processed_texts.append(processed_text)
+            entities.append(text_entities)
+            boosts.append(boost)
+        
+        # Get sentiment scores: finance-related content goes to the financial model,
+        # the rest to the general model, and TextBlob covers anything left
+        scores: List[Optional[Tuple[float, float]]] = [None] * len(texts)
+        financial_idx = []
+        general_idx = []
+        for i, text_entities in enumerate(entities):
+            if self.models_initialized and self.financial_model and text_entities:
+                financial_idx.append(i)
+            elif self.models_initialized and self.general_model:
+                general_idx.append(i)
+            else:
+                scores[i] = self._textblob_sentiment(processed_texts[i])
+        
+        for indices, model in ((financial_idx, self.financial_model), (general_idx, self.general_model)):
+            if indices:
+                batch_scores = self._transformer_sentiment_batch([processed_texts[i] for i in indices], model)
+                for i, score in zip(indices, batch_scores):
+                    scores[i] = score
+        
+        if not texts:
+            return []
+        
+        # Apply financial context boost, clamped to [-1, 1]
+        polarity, confidence = np.array(scores, dtype=np.float64).T
+        adjusted = np.clip(polarity * np.array(boosts), -1.0, 1.0)
+        
+        # Calculate emotions (simplified) for the whole batch, one row per text
+        emotions = np.empty((len(texts), len(EMOTION_INDEX)), dtype=np.float32)
+        emotions[:, EMOTION_INDEX["fear"]] = np.where(adjusted < 0, -adjusted, 0.0)
+        emotions[:, EMOTION_INDEX["greed"]] = np.where(adjusted > 0, adjusted, 0.0)
+        emotions[:, EMOTION_INDEX["uncertainty"]] = 1.0 - confidence
+        emotions[:, EMOTION_INDEX["confidence"]] = confidence
+        
+        # Scores are cached and shared between repeated texts, so keep them immutable
+        emotions.setflags(write=False)
+        
+        return [
+            SentimentScore(
+                polarity=self._classify_polarity(score),
+                confidence=text_confidence,
+                score=score,
+                emotions=text_emotions,
+                entities=tuple(text_entities)
+            )
+            for score, text_confidence, text_emotions, text_entities
+            in zip(adjusted.tolist(), confidence.tolist(), emotions, entities)
+        ]
 
 class SentimentProcessor:
     """Process raw data through sentiment analysis pipeline"""
@@ -241,13 +390,9 @@ class SentimentProcessor:
     
     async def start_processing(self):
         """Start the sentiment processing pipeline"""
+        await self.analyzer.ready()
         self.is_processing = True
-        # Start processing tasks
-        tasks = [
-            asyncio.create_task(self._process_data()),
-            asyncio.create_task(self._batch_process())
-        ]
-        await asyncio.gather(*tasks)
+        await self._batch_process()
     
     async def stop_processing(self):
         """Stop the sentiment processing pipeline"""
@@ -261,47 +406,14 @@ class SentimentProcessor:
         """Get processed data with sentiment analysis"""
         return await self.results_queue.get()
     
-    async def _process_data(self):
-        """Main data processing loop"""
-        while self.is_processing:
-            try:
-                # Get data from queue with timeout
-                raw_data = await asyncio.wait_for(
-                    self.processing_queue.get(), 
-                    timeout=1.0
-                )
-                
-                # Analyze sentiment
-                sentiment = await self.analyzer.analyze_sentiment(raw_data.content)
-                
-                # Calculate relevance score
-                relevance_score = self._calculate_relevance(raw_data, sentiment)
-                
-                # Create processed data
-                processed_data = ProcessedData(
-                    raw_data=raw_data,
-                    sentiment=sentiment,
-                    financial_entities=sentiment.entities,
-                    relevance_score=relevance_score,
-                    language="en"  # Simplified - could add language detection
-                )
-                
-                # Add to results queue
-                await self.results_queue.put(processed_data)
-                
-            except asyncio.TimeoutError:
-                # No data in queue, continue
-                continue
-            except Exception as e:
-                logger.error(f"Error processing sentiment data: {e}")
-    
     async def _batch_process(self):
         """Batch processing for efficiency"""
+        loop = asyncio.get_running_loop()
         batch = []
         while self.is_processing:
             try:
                 # Collect batch
-                while len(batch) < processing_config.BATCH_SIZE:
+                while self.is_processing and len(batch) < processing_config.BATCH_SIZE:
                     try:
                         data = await asyncio.wait_for(
                             self.processing_queue.get(), 
@@ -316,18 +428,27 @@ class SentimentProcessor:
                             continue
                 
                 if batch:
-                    # Process batch (could be optimized for transformer models)
-                    tasks = [self._process_single_item(item) for item in batch]
-                    await asyncio.gather(*tasks)
+                    # One batched analysis call for the whole batch, off the event loop
+                    sentiments = await loop.run_in_executor(
+                        None, self.analyzer.analyze_sentiment_batch, [item.content for item in batch]
+                    )
+                    for raw_data, sentiment in zip(batch, sentiments):
+                        self.results_queue.put_nowait(self._build_processed(raw_data, sentiment))
                     batch.clear()
                 
             except Exception as e:
                 logger.error(f"Error in batch processing: {e}")
+                batch.clear()
     
-    async def _process_single_item(self, raw_data: RawData):
-        """Process a single item (used in batch processing)"""
-        # This would be optimized for batch processing in production
-        await self.add_data(raw_data)
+    def _build_processed(self, raw_data: RawData, sentiment: SentimentScore) -> ProcessedData:
+        """Wrap an analyzed item as ProcessedData"""
+        return ProcessedData(
+            raw_data=raw_data,
+            sentiment=sentiment,
+            financial_entities=list(sentiment.entities),
+            relevance_score=self._calculate_relevance(raw_data, sentiment),
+            language="en"  # Simplified - could add language detection
+        )
     
     def _calculate_relevance(self, raw_data: RawData, sentiment: SentimentScore) -> float:
         """Calculate relevance score for the data"""
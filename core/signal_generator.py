@@ -3,8 +3,9 @@ Trading signal generation based on sentiment analysis
 """
 import asyncio
 import logging
+import time
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import Dict, List, Optional, Tuple
 from collections import defaultdict, deque
 import json
@@ -31,7 +32,7 @@ class SentimentAggregator:
         
         for asset in assets:
             self.sentiment_data[asset].append({
-                'timestamp': data.raw_data.timestamp,
+                'timestamp_ns': data.raw_data.timestamp_ns,
                 'sentiment_score': data.sentiment.score,
                 'confidence': data.sentiment.confidence,
                 'relevance': data.relevance_score,
@@ -99,12 +100,13 @@ class SentimentAggregator:
             return None
         
         now = datetime.now()
-        cutoff_time = now - timedelta(seconds=window_size)
+        # Compare epoch nanoseconds so naive (mock) and UTC-aware (API) timestamps mix
+        cutoff_ns = time.time_ns() - window_size * 1_000_000_000
         
         # Filter data within time window
         recent_data = [
             item for item in self.sentiment_data[asset]
-            if item['timestamp'] >= cutoff_time
+            if item['timestamp_ns'] >= cutoff_ns
         ]
         
         if not recent_data:
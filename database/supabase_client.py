@@ -2,24 +2,26 @@
 Supabase database client and operations
 """
 import logging
-from typing import List, Dict, Optional, Any
+from typing import TYPE_CHECKING, List, Dict, Optional, Any
 from datetime import datetime
-from supabase import create_client, Client
 import json
 
 from config import api_config
 from core.data_models import (
     RawData, ProcessedData, TradingSignal, AggregatedSentiment, 
-    FearGreedIndex, BacktestResult, MarketData
+    FearGreedIndex, BacktestResult, MarketData, EMOTION_INDEX
 )
 
+if TYPE_CHECKING:
+    from supabase import Client
+
 logger = logging.getLogger(__name__)
 
 class SupabaseClient:
     """Supabase database client for sentiment engine"""
     
     def __init__(self):
-        self.client: Optional[Client] = None
+        self.client: Optional["Client"] = None
         self.is_connected = False
         self._initialize_client()
     
@@ -27,6 +29,9 @@ class SupabaseClient:
         """Initialize Supabase client"""
         try:
             if api_config.SUPABASE_URL and api_config.SUPABASE_KEY:
+                # Imported here so demo runs without credentials skip loading supabase
+                from supabase import create_client
+                
                 self.client = create_client(
                     api_config.SUPABASE_URL, 
                     api_config.SUPABASE_KEY
@@ -83,7 +88,9 @@ class SupabaseClient:
                 'sentiment_score': data.sentiment.score,
                 'sentiment_polarity': data.sentiment.polarity.value,
                 'confidence': data.sentiment.confidence,
-                'emotions': json.dumps(data.sentiment.emotions),
+                'emotions': json.dumps({
+                    name: float(data.sentiment.emotions[i]) for name, i in EMOTION_INDEX.items()
+                }),
                 'entities': json.dumps(data.financial_entities),
                 'relevance_score': data.relevance_score,
                 'language': data.language,
@@ -7,6 +7,7 @@ import sys
 from datetime import datetime, timedelta
 from typing import List
 
+from api_integrations._session import install_uvloop
 from config import api_config, processing_config, trading_config
 from core.data_ingestion import DataIngestionManager
 from core.sentiment_analyzer import SentimentProcessor
@@ -214,4 +215,5 @@ async def main():
             await engine.stop()
 
 if __name__ == "__main__":
+    install_uvloop()
     asyncio.run(main())
\ No newline at end of file
@@ -6,6 +6,7 @@ import logging
 from datetime import datetime
 import sys
 
+from api_integrations._session import install_uvloop
 from main import demo_mode
 
 if __name__ == "__main__":
@@ -25,6 +26,8 @@ if __name__ == "__main__":
     print("=" * 80)
     print()
     
+    install_uvloop()
+    
     try:
         asyncio.run(demo_mode())
     except KeyboardInterrupt:
@@ -9,6 +9,7 @@ from api_integrations.twitter_client import TwitterAPIClient, DEFAULT_TWITTER_RU
 from api_integrations.reddit_client import RedditAPIClient
 from api_integrations.news_client import NewsAPIClient, AlphaVantageNewsClient
 from api_integrations.financial_data_client import FinancialDataClient
+from api_integrations._session import close_session as close_http_session, install_uvloop
 from database.supabase_client import db_client
 from config import api_config, data_config
 
@@ -231,7 +232,11 @@ class APISetupGuide:
 async def main():
     """Run API setup and testing"""
     setup_guide = APISetupGuide()
-    await setup_guide.test_all_apis()
+    try:
+        await setup_guide.test_all_apis()
+    finally:
+        await close_http_session()
 
 if __name__ == "__main__":
+    install_uvloop()
     asyncio.run(main())
\ No newline at end of file